@@ -4,10 +4,14 @@ pypopRF: Tools for geospatial modeling of population distribution.
 Core components for QGIS plugin implementation.
 """
 
-from .core.feature_extraction import FeatureExtractor
-from .core.model import Model
-from .core.dasymetric import DasymetricMapper
-from .config.settings import Settings
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .core.feature_extraction import FeatureExtractor
+    from .core.model import Model
+    from .core.dasymetric import DasymetricMapper
+    from .config.settings import Settings
 
 __version__ = "0.1.0"
 __author__ = "WorldPop SDI"
@@ -20,3 +24,25 @@ __all__ = [
     "DasymetricMapper",
     "Settings",
 ]
+
+# Public classes are imported on first access so that loading the plugin
+# does not pull in pandas, scikit-learn and rasterio up front
+_LAZY_IMPORTS = {
+    "FeatureExtractor": ".core.feature_extraction",
+    "Model": ".core.model",
+    "DasymetricMapper": ".core.dasymetric",
+    "Settings": ".config.settings",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,29 +1,161 @@
+import codecs
+import copy
+import csv
+import hashlib
+import io
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional, Tuple
-
-import pandas as pd
-import rasterio
-import yaml
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Union
 
 from ....q_models.config_manager import ConfigManager
 from ..utils.logger import get_logger
 
+if TYPE_CHECKING:
+    from rasterio.crs import CRS
+
 logger = get_logger()
 
+_YAML_CACHE_SIZE = 100
+_YAML_CACHE: "OrderedDict[str, Tuple[int, int, bytes, Dict]]" = OrderedDict()
+
+
+def _file_digest(path: Union[str, Path]) -> bytes:
+    """Stream a file through blake2b and return its digest."""
+    with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "blake2b").digest()
+
+        h = hashlib.blake2b()
+        while chunk := f.read(1 << 16):
+            h.update(chunk)
+    return h.digest()
+
+
+def _load_yaml_cached(config_path: Union[str, Path]) -> Dict:
+    """Load a YAML file, reusing the parsed content while the file is unchanged.
+
+    The file is considered unchanged when mtime and size match, or when only
+    the mtime moved but the content digest is the same (e.g. a file restored
+    from version control). Callers modify the returned dictionary in place,
+    so a deep copy of the cached value is returned.
+    """
+    key = os.path.abspath(config_path)
+    st = os.stat(key)
+
+    cached = _YAML_CACHE.get(key)
+    if cached is not None and cached[1] == st.st_size:
+        if cached[0] != st.st_mtime_ns and _file_digest(key) == cached[2]:
+            cached = (st.st_mtime_ns, st.st_size, cached[2], cached[3])
+            _YAML_CACHE[key] = cached
+
+        if cached[0] == st.st_mtime_ns:
+            _YAML_CACHE.move_to_end(key)
+            logger.debug(f"Using cached configuration: {key}")
+            return copy.deepcopy(cached[3])
+
+    import yaml
+
+    with open(key, "rb") as f:
+        data = f.read()
+
+    # libyaml's C parser is much faster than the pure Python SafeLoader
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    config = yaml.load(data, Loader=loader)
+    digest = hashlib.blake2b(data).digest()
+
+    _YAML_CACHE[key] = (st.st_mtime_ns, st.st_size, digest, config)
+    _YAML_CACHE.move_to_end(key)
+    if len(_YAML_CACHE) > _YAML_CACHE_SIZE:
+        _YAML_CACHE.popitem(last=False)
+
+    return copy.deepcopy(config)
+
+
+_PROFILE_CACHE_SIZE = 256
+_PROFILE_CACHE: Dict[Tuple[str, int], Tuple[Optional["CRS"], float, int, int]] = {}
+_PROFILE_LOCK = threading.Lock()
+
+# Header probes touch a handful of blocks at most, keep GDAL's block cache small
+_PROBE_GDAL_OPTIONS = {"GDAL_CACHEMAX": 64}
+
+
+def _probe_raster(path: str) -> Tuple[Optional["CRS"], float, int, int]:
+    """Read (crs, resolution, width, height) of a raster, cached on path and mtime.
+
+    Only these fields are kept so that no dataset handle outlives the call. The
+    CRS object is kept rather than its WKT, so probes compare CRSs with ==
+    like rasterio does and equivalent definitions written differently match.
+    """
+    abs_path = os.path.abspath(path)
+    key = (abs_path, os.stat(abs_path).st_mtime_ns)
+
+    probe = _PROFILE_CACHE.get(key)
+    if probe is None:
+        import rasterio
+
+        # rasterio environments are thread local, so each probe thread sets its own
+        with rasterio.Env(**_PROBE_GDAL_OPTIONS), rasterio.open(abs_path) as src:
+            probe = (src.crs, src.transform[0], src.width, src.height)
+
+        with _PROFILE_LOCK:
+            _PROFILE_CACHE[key] = probe
+            if len(_PROFILE_CACHE) > _PROFILE_CACHE_SIZE:
+                del _PROFILE_CACHE[next(iter(_PROFILE_CACHE))]
+
+    return probe
+
+
+def _read_csv_header(file_path: str) -> List[str]:
+    """Read only the header row of a CSV file."""
+    with open(file_path, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), [])
+
 
 def rename_column_in_csv(file_path: str, old_column_name: str, new_column_name: str) -> bool:
 
+    tmp_path = None
     try:
         logger.info(f"Renaming column '{old_column_name}' to '{new_column_name}' in file {file_path}")
 
-        df = pd.read_csv(file_path)
+        with open(file_path, "rb") as src:
+            header_line = src.readline()
+        header = next(csv.reader([header_line.decode("utf-8-sig")]), [])
 
-        if old_column_name not in df.columns:
+        if old_column_name not in header:
             logger.error(f"Column '{old_column_name}' not found in the file")
             return False
 
-        df = df.rename(columns={old_column_name: new_column_name})
-        df.to_csv(file_path, index=False)
+        header = [new_column_name if c == old_column_name else c for c in header]
+        newline = "\r\n" if header_line.endswith(b"\r\n") else "\n"
+        buf = io.StringIO()
+        csv.writer(buf, lineterminator=newline).writerow(header)
+        new_header = buf.getvalue().encode("utf-8")
+
+        if len(new_header) == len(header_line) and not header_line.startswith(codecs.BOM_UTF8):
+            # Same byte length: overwrite the header in place, leave the body untouched
+            with open(file_path, "r+b") as f:
+                f.write(new_header)
+        else:
+            # Rewrite the header only; the body is copied byte for byte
+            with open(file_path, "rb") as src, tempfile.NamedTemporaryFile(
+                "wb", dir=os.path.dirname(os.path.abspath(file_path)), suffix=".csv", delete=False
+            ) as tmp:
+                tmp_path = tmp.name
+                src.seek(len(header_line))
+                tmp.write(new_header)
+                shutil.copyfileobj(src, tmp, length=1 << 20)
+
+            shutil.copymode(file_path, tmp_path)
+            os.replace(tmp_path, file_path)
+            tmp_path = None
+
         logger.info(f"Successfully renamed column in {file_path}")
         return True
 
@@ -31,6 +163,10 @@ def rename_column_in_csv(file_path: str, old_column_name: str, new_column_name:
         logger.error(f"Failed to rename column in CSV file: {str(e)}")
         return False
 
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 
 class Settings:
     """Configuration settings manager for pypopRF.
@@ -39,6 +175,10 @@ class Settings:
     including file paths, processing parameters, and validation of inputs.
     """
 
+    # Digest of the inputs each field was last validated successfully against
+    _FIELD_DIGESTS: Dict[str, bytes] = {}
+    _FIELDS = ("mastergrid", "covariates", "census", "agesex")
+
     def __init__(
         self,
         work_dir: str = ".",
@@ -54,10 +194,14 @@ class Settings:
         output_dir: Optional[str] = None,
         by_block: bool = True,
         block_size: Tuple[int, int] = (512, 512),
+        window_size: int = 2048,
+        io_batch: int = 4,
         max_workers: int = 4,
         show_progress: bool = True,
         log_scale: bool = True,
         selection_threshold: float = 0.01,
+        cache_importance: bool = False,
+        write_intermediate: bool = True,
         logging: Optional[Dict] = None,
     ):
         """Initialize Settings.
@@ -76,10 +220,16 @@ class Settings:
             output_dir: Directory for outputs
             by_block: Process by blocks
             block_size: Block dimensions (width, height)
+            window_size: Edge length of the windows used to write output rasters
+            io_batch: Number of neighbouring blocks in a row read by one worker
+                when calculating zonal statistics and masks
             max_workers: Max parallel workers
             show_progress: Show progress bars
             log_scale: Whether to train model on log(dens)
             selection_threshold: Threshold for feature selection in the model
+            cache_importance: Reuse permutation importance cached in work_dir/.cache
+                by earlier runs on the same data and forest parameters
+            write_intermediate: Write normalized census rasters alongside the population outputs
             logging: Logging configuration
 
         Raises:
@@ -88,6 +238,9 @@ class Settings:
         """
         logger.info("Initializing pypopRF settings")
 
+        # One os.stat per input path for the lifetime of this instance
+        self._stat_cache: Dict[str, os.stat_result] = {}
+
         # Initialize paths
         self._init_paths(work_dir, data_dir, output_dir)
 
@@ -103,10 +256,14 @@ class Settings:
         # Processing settings
         self.by_block = by_block
         self.block_size = tuple(block_size)
+        self.window_size = window_size
+        self.io_batch = max(1, int(io_batch))
         self.max_workers = max_workers
         self.show_progress = show_progress
         self.log_scale = log_scale
         self.selection_threshold = selection_threshold
+        self.cache_importance = cache_importance
+        self.write_intermediate = write_intermediate
 
         # Logging settings
         self._init_logging(logging)
@@ -117,8 +274,12 @@ class Settings:
 
     def _init_paths(self, work_dir: str, data_dir: str, output_dir: Optional[str]) -> None:
         """Initialize directory paths."""
-        self.work_dir = Path(work_dir).resolve()
+        # from_file already passes an absolute work_dir; resolve() would walk
+        # every path component again, which is slow on network drives
+        work_dir = Path(work_dir)
+        self.work_dir = work_dir if work_dir.is_absolute() else work_dir.resolve()
         self.data_dir = self.work_dir / data_dir
+        self._data_dir_str = str(self.data_dir)
 
         if output_dir:
             self.output_dir = Path(output_dir)
@@ -141,12 +302,18 @@ class Settings:
         self.covariate = {}
         if covariates:
             self.covariate = {
-                key: self._resolve_path(path) for key, path in covariates.items()
+                sys.intern(key): self._resolve_path(path) for key, path in covariates.items()
             }
 
         if not self.covariate:
             raise ValueError("At least one covariate is required")
 
+        # Parallel name/path tuples in sorted order for iteration
+        self.covariate_names: Tuple[str, ...] = tuple(sorted(self.covariate))
+        self.covariate_paths: Tuple[str, ...] = tuple(
+            self.covariate[name] for name in self.covariate_names
+        )
+
     def _init_census(
         self,
         census_data: Optional[str],
@@ -177,10 +344,167 @@ class Settings:
         if not path:
             return None
 
-        p = Path(path)
-        if not p.is_absolute():
-            return str(self.data_dir / path)
-        return str(p)
+        if os.path.isabs(path):
+            return path
+        return os.path.join(self._data_dir_str, path)
+
+    def _stat(self, path: str) -> Optional[os.stat_result]:
+        """Return cached os.stat result for path, or None if it does not exist."""
+        st = self._stat_cache.get(path)
+        if st is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            self._stat_cache[path] = st
+        return st
+
+    def _is_file(self, path: str) -> bool:
+        """Check that path is a regular file using the cached stat result."""
+        st = self._stat(path)
+        return st is not None and stat.S_ISREG(st.st_mode)
+
+    def _field_digest(self, paths: Tuple[Optional[str], ...], extra: Tuple = ()) -> bytes:
+        """Hash paths, extra values and the size/mtime of each path."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((paths, extra)).encode())
+        for path in paths:
+            st = self._stat(path) if path else None
+            if st is not None:
+                h.update(f"{st.st_size}:{st.st_mtime_ns};".encode())
+            else:
+                h.update(b"missing;")
+        return h.digest()
+
+    def _check_field(
+        self, field: str, digest_fn: Callable[[], bytes], validator: Callable[[], None]
+    ) -> None:
+        """Run validator unless the field's inputs match its last successful validation."""
+        digest = digest_fn()
+        if self._FIELD_DIGESTS.get(field) == digest:
+            logger.debug(f"Skipping {field} validation, inputs unchanged")
+            return
+
+        validator()
+
+        # Only remember inputs that validated without being adjusted
+        if digest_fn() == digest:
+            self._FIELD_DIGESTS[field] = digest
+
+    @classmethod
+    def invalidate(cls, field: str) -> None:
+        """Force the given field to be validated again by the next instance.
+
+        Args:
+            field: One of 'mastergrid', 'covariates', 'census' or 'agesex'
+        """
+        if field not in cls._FIELDS:
+            raise ValueError(f"Unknown settings field: {field}")
+        cls._FIELD_DIGESTS.pop(field, None)
+
+    @classmethod
+    def clear_validation_cache(cls) -> None:
+        """Forget previously validated inputs so the next instance is fully validated."""
+        cls._FIELD_DIGESTS.clear()
+
+    @staticmethod
+    def _diagnose_mismatch(name: str, probe: Tuple, template: Tuple) -> None:
+        """Log which of CRS, resolution, width and height differ from the template."""
+        for field, value, expected in zip(
+            ("CRS", "Resolution", "Width", "Height"), probe, template
+        ):
+            if value != expected:
+                logger.warning(f"Covariate {name}: {field} mismatch")
+
+    def _validate_mastergrid(self) -> None:
+        """Check that the mastergrid exists and load its profile."""
+        if self.mastergrid == "create":
+            return
+
+        if not self._is_file(self.mastergrid):
+            logger.error(f"Mastergrid file not found: {self.mastergrid}")
+            raise FileNotFoundError(f"Mastergrid file not found: {self.mastergrid}")
+        _probe_raster(self.mastergrid)
+        logger.debug("Mastergrid template profile loaded")
+
+    def _validate_covariates(self) -> None:
+        """Check that covariates exist and match the mastergrid grid."""
+        logger.info("Validating covariates")
+        for name, path in zip(self.covariate_names, self.covariate_paths):
+            if not self._is_file(path):
+                logger.error(f"Covariate file not found: {path} ({name})")
+                raise FileNotFoundError(f"Covariate file not found: {path} ({name})")
+
+        # Opening rasters is I/O bound and GDAL releases the GIL, so probe in parallel
+        n_threads = max(1, min(8, self.max_workers, len(self.covariate)))
+        with ThreadPoolExecutor(max_workers=n_threads) as executor:
+            probes = list(executor.map(_probe_raster, self.covariate_paths))
+
+        if self.mastergrid != "create":
+            template = _probe_raster(self.mastergrid)
+        else:
+            template = probes[0]
+
+        for name, probe in zip(self.covariate_names, probes):
+            if probe != template:
+                self._diagnose_mismatch(name, probe, template)
+
+    def _validate_census(self) -> None:
+        """Check census file format and required columns."""
+        logger.info("Validating census data")
+        census_path = Path(self.census["path"])
+        if not self._is_file(self.census["path"]):
+            logger.error(f"Census file not found: {census_path}")
+            raise FileNotFoundError(f"Census file not found: {census_path}")
+
+        if census_path.suffix.lower() != ".csv":
+            logger.error("Census file must be CSV format")
+            raise ValueError("Census file must be CSV format")
+
+        if self.census["pop_column"] == "sum":
+            logger.warning("Column name 'sum' can cause conflicts with data processing")
+            new_column_name = "population"
+
+            success = rename_column_in_csv(str(census_path), "sum", new_column_name)
+            if success:
+                self._stat_cache.pop(self.census["path"], None)
+                logger.info(f"Renamed column 'sum' to '{new_column_name}' in file")
+                self.census["pop_column"] = new_column_name
+                config_path = Path(self.work_dir) / "config.yaml"
+                if config_path.exists():
+                    temp_config = ConfigManager(logger)
+                    temp_config.config_path = str(config_path)
+                    temp_config.update_config("census_pop_column", "population")
+
+        try:
+            header = set(_read_csv_header(str(census_path)))
+            missing_cols = [
+                col
+                for col in [self.census["pop_column"], self.census["id_column"]]
+                if col not in header
+            ]
+            if missing_cols:
+                logger.error(
+                    f"Missing required columns in census data: {', '.join(missing_cols)}"
+                )
+                raise ValueError(
+                    f"Missing required columns in census data: {', '.join(missing_cols)}"
+                )
+        except Exception as e:
+            logger.error(f"Error reading census file: {str(e)}")
+            raise ValueError(f"Error reading census file: {str(e)}")
+
+    def _validate_agesex(self) -> None:
+        """Check the optional age-sex census file, dropping it if missing."""
+        agesex_path = Path(self.agesex_data)
+        if not self._is_file(self.agesex_data):
+            logger.warning(
+                f"Age-sex census file not found: {self.agesex_data}, proceeding without age-sex structure"
+            )
+            self.agesex_data = None
+        elif agesex_path.suffix.lower() != ".csv":
+            logger.error("Age-sex census file must be CSV format")
+            raise ValueError("Age-sex census file must be CSV format")
 
     def _validate_settings(self) -> None:
         """
@@ -212,117 +536,71 @@ class Settings:
             logger.error("At least one covariate is required")
             raise ValueError("At least one covariate is required")
 
-        template_profile = None
-
-        if self.mastergrid != "create":
-            if not Path(self.mastergrid).is_file():
-                logger.error(f"Mastergrid file not found: {self.mastergrid}")
-                raise FileNotFoundError(f"Mastergrid file not found: {self.mastergrid}")
-            with rasterio.open(self.mastergrid) as src:
-                template_profile = src.profile
-                logger.debug("Mastergrid template profile loaded")
+        self._check_field(
+            "mastergrid",
+            lambda: self._field_digest((self.mastergrid,)),
+            self._validate_mastergrid,
+        )
 
         if self.mask is not None:
-            mask_path = Path(self.mask)
-            if not mask_path.is_file():
+            if not self._is_file(self.mask):
                 logger.error(f"Mask file not found: {self.mask}")
                 raise FileNotFoundError(f"Mask file not found: {self.mask}")
 
         if self.constrain is not None:
-            constrain_path = Path(self.constrain)
-            if not constrain_path.is_file():
+            if not self._is_file(self.constrain):
                 logger.warning(
                     f"Constraining file not found: {self.constrain}, proceeding without constrain"
                 )
                 self.constrain = None
 
-        logger.info("Validating covariates")
-        for name, path in self.covariate.items():
-            if not Path(path).is_file():
-                logger.error(f"Covariate file not found: {path} ({name})")
-                raise FileNotFoundError(f"Covariate file not found: {path} ({name})")
-
-            with rasterio.open(path) as src:
-                if template_profile is None:
-                    template_profile = src.profile
-                else:
-                    if src.crs != template_profile["crs"]:
-                        logger.warning(f"Covariate {name}: CRS mismatch")
-                    if src.transform[0] != template_profile["transform"][0]:
-                        logger.warning(f"Covariate {name}: Resolution mismatch")
-                    if src.width != template_profile["width"]:
-                        logger.warning(f"Covariate {name}: Width mismatch")
-                    if src.height != template_profile["height"]:
-                        logger.warning(f"Covariate {name}: Height mismatch")
-
-        logger.info("Validating census data")
-        census_path = Path(self.census["path"])
-        if not census_path.is_file():
-            logger.error(f"Census file not found: {census_path}")
-            raise FileNotFoundError(f"Census file not found: {census_path}")
-
-        if census_path.suffix.lower() != ".csv":
-            logger.error("Census file must be CSV format")
-            raise ValueError("Census file must be CSV format")
-
-        if self.census["pop_column"] == "sum":
-            logger.warning("Column name 'sum' can cause conflicts with data processing")
-            new_column_name = "population"
+        self._check_field(
+            "covariates",
+            lambda: self._field_digest(
+                (self.mastergrid, *self.covariate_paths), self.covariate_names
+            ),
+            self._validate_covariates,
+        )
 
-            success = rename_column_in_csv(str(census_path), "sum", new_column_name)
-            if success:
-                logger.info(f"Renamed column 'sum' to '{new_column_name}' in file")
-                self.census["pop_column"] = new_column_name
-                config_path = Path(self.work_dir) / "config.yaml"
-                if config_path.exists():
-                    temp_config = ConfigManager(logger)
-                    temp_config.config_path = str(config_path)
-                    temp_config.update_config("census_pop_column", "population")
+        self._check_field(
+            "census",
+            lambda: self._field_digest(
+                (self.census["path"],), (self.census["pop_column"], self.census["id_column"])
+            ),
+            self._validate_census,
+        )
 
-        # Validate agesex data if provided
         if self.agesex_data is not None:
-            agesex_path = Path(self.agesex_data)
-            if not agesex_path.is_file():
-                logger.warning(
-                    f"Age-sex census file not found: {self.agesex_data}, proceeding without age-sex structure"
-                )
-                self.agesex_data = None
-            elif agesex_path.suffix.lower() != ".csv":
-                logger.error("Age-sex census file must be CSV format")
-                raise ValueError("Age-sex census file must be CSV format")
-
-        try:
-            df = pd.read_csv(census_path, nrows=1)
-            missing_cols = []
-            for col in [self.census["pop_column"], self.census["id_column"]]:
-                if col not in df.columns:
-                    missing_cols.append(col)
-                if missing_cols:
-                    logger.error(
-                        f"Missing required columns in census data: {', '.join(missing_cols)}"
-                    )
-                    raise ValueError(
-                        f"Missing required columns in census data: {', '.join(missing_cols)}"
-                    )
-        except Exception as e:
-            logger.error(f"Error reading census file: {str(e)}")
-            raise ValueError(f"Error reading census file: {str(e)}")
+            self._check_field(
+                "agesex",
+                lambda: self._field_digest((self.agesex_data,)),
+                self._validate_agesex,
+            )
 
         logger.info("Settings validation completed successfully")
 
     @classmethod
-    def validate_config_file(cls, config_path: str) -> None:
+    def validate_config_file(cls, config_path: Union[str, Path, Dict]) -> Dict:
         """
         Validate configuration file structure.
 
         Args:
-            config_path: Path to YAML configuration file
+            config_path: Path to YAML configuration file or an already parsed
+                configuration dictionary
+
+        Returns:
+            Dict: The validated configuration
 
         Raises:
             ValueError: If configuration file is missing required fields
                        or has invalid structure
         """
-        logger.info(f"Validating configuration file: {config_path}")
+        if isinstance(config_path, dict):
+            config = config_path
+            logger.info("Validating configuration")
+        else:
+            logger.info(f"Validating configuration file: {config_path}")
+            config = _load_yaml_cached(config_path)
 
         required_fields = {
             "work_dir",
@@ -332,9 +610,6 @@ class Settings:
             "census_id_column",
         }
 
-        with open(config_path) as f:
-            config = yaml.safe_load(f)
-
         missing = required_fields - set(config.keys())
         if missing:
             logger.error(f"Missing required fields in config: {missing}")
@@ -345,6 +620,7 @@ class Settings:
             raise ValueError("'covariates' must be a dictionary")
 
         logger.info("Configuration file validation successful")
+        return config
 
     @classmethod
     def from_file(cls, config_path: Path) -> "Settings":
@@ -362,10 +638,7 @@ class Settings:
         """
         logger.info(f"Loading settings from file: {config_path}")
 
-        cls.validate_config_file(config_path)
-
-        with open(config_path) as f:
-            config = yaml.safe_load(f)
+        config = cls.validate_config_file(config_path)
 
         # Resolve work_dir relative to config file location
         config_dir = Path(config_path).parent.resolve()
@@ -384,30 +657,37 @@ class Settings:
             str: Formatted string containing all settings
         """
 
-        covariate_str = "\n    ".join(
-            f"- {key}: {value}" for key, value in self.covariate.items()
-        )
-        return (
-            f"pypopRF Settings:\n"
-            f"  Work Directory: {self.work_dir}\n"
-            f"  Output Directory: {self.output_dir}\n"
-            f"  Mastergrid: {self.mastergrid}\n"
-            f"  Mask: {self.mask}\n"
-            f"  Constrain: {self.constrain}\n"
-            f"  Covariates:\n    {covariate_str}\n"
-            f"  Census:\n"
-            f"    Path: {self.census['path']}\n"
-            f"    Pop Column: {self.census['pop_column']}\n"
-            f"    ID Column: {self.census['id_column']}\n"
-            f"  Age-Sex Data: {self.agesex_data}\n"
-            f"  Processing:\n"
-            f"    By Block: {self.by_block}\n"
-            f"    Block Size: {self.block_size}\n"
-            f"    Max Workers: {self.max_workers}\n"
-            f"    Show Progress: {self.show_progress}"
-            f"    Log Scale: {self.log_scale}"
-            f"    CCS Limit: {self.log_scale}"
-            f"  Logging:\n"
-            f"    Level: {self.logging['level']}\n"
-            f"    File: {self.logging['file']}"
+        lines = [
+            "pypopRF Settings:",
+            f"  Work Directory: {self.work_dir}",
+            f"  Output Directory: {self.output_dir}",
+            f"  Mastergrid: {self.mastergrid}",
+            f"  Mask: {self.mask}",
+            f"  Constrain: {self.constrain}",
+            "  Covariates:",
+        ]
+        lines.extend(f"    - {key}: {value}" for key, value in self.covariate.items())
+        lines.extend(
+            [
+                "  Census:",
+                f"    Path: {self.census['path']}",
+                f"    Pop Column: {self.census['pop_column']}",
+                f"    ID Column: {self.census['id_column']}",
+                f"  Age-Sex Data: {self.agesex_data}",
+                "  Processing:",
+                f"    By Block: {self.by_block}",
+                f"    Block Size: {self.block_size}",
+                f"    Window Size: {self.window_size}",
+                f"    IO Batch: {self.io_batch}",
+                f"    Max Workers: {self.max_workers}",
+                f"    Show Progress: {self.show_progress}",
+                f"    Log Scale: {self.log_scale}",
+                f"    CCS Limit: {self.selection_threshold}",
+                f"    Cache Importance: {self.cache_importance}",
+                f"    Write Intermediate: {self.write_intermediate}",
+                "  Logging:",
+                f"    Level: {self.logging['level']}",
+                f"    File: {self.logging['file']}",
+            ]
         )
+        return "\n".join(lines)
@@ -1,19 +1,42 @@
+import logging
+import queue
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Optional, Tuple, Any
+from typing import Any, Dict, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 import rasterio
 from qgis.PyQt.QtCore import QThreadPool
-from rasterio.windows import Window
+from rasterio.windows import Window, subdivide
 
 from ..config.settings import Settings
 from ..utils.logger import get_logger
-from ..utils.raster import raster_stat
-from ..utils.workers import NormalizationWorker, DasymetricWorker, ScaledRasterWorker
+from ..utils.lookup import ZoneLookup, merge_unique_zones, merge_zonal_sums
+from ..utils.raster import batch_windows, get_windows, raster_stat
+from ..utils.workers import (
+    DasymetricWorker,
+    InputScanWorker,
+    close_cached_datasets,
+    dasymetric_window,
+)
 
 logger = get_logger()
 
+# One GDAL environment for a whole mapping run, so rasters opened on the
+# calling thread share a warm block cache instead of setting up their own,
+# and GDAL can use all cores to (de)compress their blocks
+_MAP_GDAL_OPTIONS = {"GDAL_CACHEMAX": 512, "VSI_CACHE": True, "GDAL_NUM_THREADS": "ALL_CPUS"}
+
+# Tiled, deflate-compressed outputs; GDAL compresses tiles on all cores
+_OUTPUT_CREATION_OPTIONS = {
+    "driver": "GTiff",
+    "tiled": True,
+    "compress": "deflate",
+    "predictor": 3,
+    "num_threads": "all_cpus",
+}
+
 
 class DasymetricMapper:
     """
@@ -33,6 +56,7 @@ class DasymetricMapper:
         self.settings = settings
         self.output_dir = Path(settings.work_dir) / "output"
         self.output_dir.mkdir(exist_ok=True)
+        self._zone_sums = {}
 
     @staticmethod
     def _validate_census(
@@ -59,7 +83,8 @@ class DasymetricMapper:
 
         # Get column names from DataFrame
         cols = census.columns.values
-        logger.debug(f"Available columns: {cols.tolist()}")
+        if logger.is_enabled_for(logging.DEBUG):
+            logger.debug(f"Available columns: {cols.tolist()}")
 
         # Get column names from kwargs with defaults
         pop_column = kwargs.get("pop_column", "pop")
@@ -78,8 +103,9 @@ class DasymetricMapper:
             logger.error(error_msg)
             raise ValueError(error_msg)
 
-        # Validate population values
-        if (census[pop_column] < 0).any():
+        # Validate population values; unsigned columns cannot be negative
+        pop = census[pop_column].to_numpy()
+        if not np.issubdtype(pop.dtype, np.unsignedinteger) and (pop < 0).any():
             logger.error("Found negative population values in census data")
             raise ValueError("Found negative population values in census data")
 
@@ -140,6 +166,97 @@ class DasymetricMapper:
             return "Population raster"
         return "Raster"
 
+    def _validation_windows(self, src) -> list:
+        """
+        Get windows for scanning the input rasters.
+
+        Uses the native block layout of tiled rasters; striped rasters are
+        read in windows of the configured block size instead of row by row.
+        Neighbouring windows in a row are joined in groups of io_batch.
+
+        Args:
+            src: Open rasterio dataset
+
+        Returns:
+            List of windows covering the raster
+        """
+        if not self.settings.by_block:
+            return [Window(0, 0, src.width, src.height)]
+
+        block_height, block_width = src.block_shapes[0]
+        if block_width < src.width:
+            windows = [window for _, window in src.block_windows(1)]
+        else:
+            logger.info(
+                f"Prediction raster is not tiled, reading in {self.settings.block_size} windows"
+            )
+            windows = get_windows(src, self.settings.block_size)
+        return batch_windows(windows, self.settings.io_batch)
+
+    def _output_windows(self, dst) -> list:
+        """
+        Get windows for writing an output raster.
+
+        Windows span several output blocks so each worker does a sizeable
+        read and write; their edges stay aligned to the block grid.
+
+        Args:
+            dst: Output rasterio dataset
+
+        Returns:
+            List of windows covering the raster
+        """
+        block_height, block_width = dst.block_shapes[0]
+        size = self.settings.window_size
+        return list(
+            subdivide(
+                Window(0, 0, dst.width, dst.height),
+                max(size // block_height, 1) * block_height,
+                max(size // block_width, 1) * block_width,
+            )
+        )
+
+    def _scan_inputs(self, file_paths: dict, windows: list) -> list:
+        """
+        Read the input rasters once, window by window.
+
+        Args:
+            file_paths: Paths to prediction, mastergrid and optional constraining raster
+            windows: Windows to scan
+
+        Returns:
+            List of per-window InputScanWorker results
+        """
+        InputScanWorker.init_progress(len(windows), logger)
+        try:
+            if len(windows) == 1:
+                worker = InputScanWorker(window=windows[0], file_paths=file_paths)
+                worker.run()
+                workers = [worker]
+            else:
+                executor = QThreadPool.globalInstance()
+                executor.setMaxThreadCount(self.settings.max_workers)
+                workers = []
+
+                for i, window in enumerate(windows):
+                    worker = InputScanWorker(window=window, file_paths=file_paths, idx=i)
+                    worker.setAutoDelete(False)
+                    workers.append(worker)
+                    executor.start(worker)
+
+                executor.waitForDone()
+            InputScanWorker.progress_bar.finish()
+        finally:
+            close_cached_datasets()
+
+        results = [w.result for w in workers if w.result is not None]
+        workers.clear()
+        if len(results) != len(windows):
+            error_msg = "Failed to read input rasters"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+        return results
+
     def _validate_inputs(
         self,
         prediction_path: str,
@@ -149,6 +266,9 @@ class DasymetricMapper:
         """
         Validate input files and their compatibility.
 
+        The rasters are read in a single windowed pass that also collects the
+        per-zone prediction sums later used for normalization.
+
         Args:
             prediction_path: Path to prediction raster
             mastergrid_path: Path to mastergrid raster
@@ -170,77 +290,104 @@ class DasymetricMapper:
                 logger.error(error_msg)
                 raise FileNotFoundError(error_msg)
 
-        # Load and check prediction raster
-        logger.info("Validating prediction raster")
         with rasterio.open(prediction_path) as pred:
             pred_profile = pred.profile
-            pred_data = pred.read(1)
             pred_nodata = pred.nodata
+            windows = self._validation_windows(pred)
 
-            # Validate prediction values
-            valid_pred = pred_data[pred_data != pred_nodata]
-            if len(valid_pred) == 0:
-                error_msg = "Prediction raster contains no valid data"
-                logger.error(error_msg)
-                raise ValueError(error_msg)
-
-            logger.info("Prediction raster statistics:")
-            logger.info(f"- Shape: {pred_data.shape}")
-            logger.info(f"- Valid pixels: {len(valid_pred)}")
-            logger.info(f"- Value range: [{valid_pred.min():.2f}, {valid_pred.max():.2f}]")
-            logger.info(f"- NoData value: {pred_nodata}")
-
-        # Load and check mastergrid
-        logger.info("Validating mastergrid")
         with rasterio.open(mastergrid_path) as mst:
-            mst_profile = mst.profile
-            mst_data = mst.read(1)
             mst_nodata = mst.nodata
-
             self._check_compatibility(
-                mst_profile, pred_profile, labels=("mastergrid", "prediction")
+                mst.profile, pred_profile, labels=("mastergrid", "prediction")
             )
 
-            # Analyze mastergrid content
-            unique_zones = np.unique(mst_data[mst_data != mst_nodata])
-            if len(unique_zones) == 0:
-                error_msg = "Mastergrid contains no valid zones"
-                logger.error(error_msg)
-                raise ValueError(error_msg)
-
-            logger.info("Mastergrid statistics:")
-            logger.info(f"- Shape: {mst_data.shape}")
-            logger.info(f"- Unique zones: {len(unique_zones)}")
-            logger.info(f"- Zone ID range: [{unique_zones.min()}, {unique_zones.max()}]")
-            logger.info(f"- NoData value: {mst_nodata}")
-
-        # Load and check mastergrid
         if constrain_path:
-            logger.info("Validating constraining raster")
             with rasterio.open(constrain_path) as con:
-                con_profile = con.profile
-                con_data = con.read(1)
                 con_nodata = con.nodata
-
-                # Check compatibility
                 self._check_compatibility(
-                    con_profile, pred_profile, labels=("constraining", "prediction")
+                    con.profile, pred_profile, labels=("constraining", "prediction")
                 )
 
-                # Analyze mastergrid content
-                valid_con = np.unique(con_data[con_data != con_nodata])
-                if len(valid_con) == 0:
-                    error_msg = "Constraining raster contains no valid data"
-                    logger.error(error_msg)
-                    raise ValueError(error_msg)
+        file_paths = {
+            "prediction": prediction_path,
+            "mastergrid": mastergrid_path,
+            "constrain": constrain_path,
+        }
+        results = self._scan_inputs(file_paths, windows)
+        shape = (pred_profile["height"], pred_profile["width"])
+
+        # Check prediction raster
+        logger.info("Validating prediction raster")
+        valid_count = sum(r["count"] for r in results)
+        if valid_count == 0:
+            error_msg = "Prediction raster contains no valid data"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+
+        vmin = min(r["min"] for r in results if r["count"])
+        vmax = max(r["max"] for r in results if r["count"])
+
+        logger.info("Prediction raster statistics:")
+        logger.info(f"- Shape: {shape}")
+        logger.info(f"- Valid pixels: {valid_count}")
+        logger.info(f"- Value range: [{vmin:.2f}, {vmax:.2f}]")
+        logger.info(f"- NoData value: {pred_nodata}")
+
+        # Check mastergrid
+        logger.info("Validating mastergrid")
+        unique_zones = merge_unique_zones([r["zones"]["mastergrid"][0] for r in results])
+        if len(unique_zones) == 0:
+            error_msg = "Mastergrid contains no valid zones"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+
+        logger.info("Mastergrid statistics:")
+        logger.info(f"- Shape: {shape}")
+        logger.info(f"- Unique zones: {len(unique_zones)}")
+        logger.info(f"- Zone ID range: [{unique_zones.min()}, {unique_zones.max()}]")
+        logger.info(f"- NoData value: {mst_nodata}")
+
+        self._zone_sums = {
+            (prediction_path, str(mastergrid_path)): self._zone_sum_table(results, "mastergrid")
+        }
+
+        # Check constraining raster
+        if constrain_path:
+            logger.info("Validating constraining raster")
+            valid_con = merge_unique_zones([r["zones"]["constrain"][0] for r in results])
+            if len(valid_con) == 0:
+                error_msg = "Constraining raster contains no valid data"
+                logger.error(error_msg)
+                raise ValueError(error_msg)
+
+            logger.info("Constraining raster statistics:")
+            logger.info(f"- Shape: {shape}")
+            logger.info(f"- Valid pixels: {len(valid_con)}")
+            logger.info(f"- NoData value: {con_nodata}")
 
-                logger.info("Constraining raster statistics:")
-                logger.info(f"- Shape: {con_data.shape}")
-                logger.info(f"- Valid pixels: {len(valid_con)}")
-                logger.info(f"- NoData value: {con_nodata}")
+            self._zone_sums[(prediction_path, str(constrain_path))] = self._zone_sum_table(
+                results, "constrain"
+            )
 
         logger.info("Input validation completed successfully")
 
+    @staticmethod
+    def _zone_sum_table(results: list, key: str, min_count: int = 1) -> pd.DataFrame:
+        """
+        Merge per-window zonal sums into a table like raster_stat returns.
+
+        Args:
+            results: Per-window InputScanWorker results
+            key: Zone grid to merge ('mastergrid' or 'constrain')
+            min_count: Minimum pixel count for a zone to be kept
+
+        Returns:
+            DataFrame with id, count and sum columns
+        """
+        ids, counts, sums = merge_zonal_sums([r["zones"][key][1] for r in results])
+        keep = counts > min_count
+        return pd.DataFrame({"id": ids[keep], "count": counts[keep], "sum": sums[keep]})
+
     def _validate_agesex(census: pd.DataFrame, id_column: str) -> tuple[Any, str, list[Any]]:
         """
         Validate census data and extract column names.
@@ -262,7 +409,8 @@ class DasymetricMapper:
 
         # Get column names from DataFrame
         cols = census.columns.values
-        logger.debug(f"Available columns: {cols.tolist()}")
+        if logger.is_enabled_for(logging.DEBUG):
+            logger.debug(f"Available columns: {cols.tolist()}")
 
         # Get column names from kwargs with defaults
         pop_columns = [c for c in cols if c[0] in ["f", "F", "m", "M"]]
@@ -302,7 +450,12 @@ class DasymetricMapper:
         try:
             if file_ext == ".csv":
                 logger.debug(f"Loading CSV file: {census_path}")
-                census = pd.read_csv(census_path)
+                # Only the ID and population columns are used downstream;
+                # read everything if either is missing so validation reports it
+                columns = [kwargs.get("id_column", "id"), kwargs.get("pop_column", "pop")]
+                header = pd.read_csv(census_path, nrows=0).columns
+                usecols = columns if header.isin(columns).sum() == 2 else None
+                census = pd.read_csv(census_path, usecols=usecols)
             else:
                 error_msg = f"Unsupported census file format: {file_ext}"
                 logger.error(error_msg)
@@ -313,7 +466,8 @@ class DasymetricMapper:
             raise ValueError(error_msg)
 
         logger.info(f"Census data loaded: {len(census)} rows")
-        logger.debug(f"Available columns: {census.columns.tolist()}")
+        if logger.is_enabled_for(logging.DEBUG):
+            logger.debug(f"Available columns: {census.columns.tolist()}")
 
         # Validate census data
         try:
@@ -324,7 +478,7 @@ class DasymetricMapper:
             raise ValueError(error_msg)
 
         # Basic data quality checks
-        total_pop = census[pop_column].sum()
+        total_pop = np.nansum(census[pop_column].to_numpy())
         if total_pop <= 0:
             error_msg = "Total population must be greater than 0"
             logger.error(error_msg)
@@ -412,66 +566,96 @@ class DasymetricMapper:
             logger.info("Using standard mastergrid for normalization")
             reference_grid = self.settings.mastergrid
 
-        sum_prob = raster_stat(
-            prediction_path,
-            reference_grid,
-            by_block=self.settings.by_block,
-            max_workers=self.settings.max_workers,
-            block_size=self.settings.block_size,
-        )
+        # Reuse the zonal sums collected while validating the inputs
+        sum_prob = self._zone_sums.get((prediction_path, str(reference_grid)))
+        if sum_prob is None:
+            sum_prob = raster_stat(
+                prediction_path,
+                reference_grid,
+                by_block=self.settings.by_block,
+                max_workers=self.settings.max_workers,
+                block_size=self.settings.block_size,
+                io_batch=self.settings.io_batch,
+            )
 
-        stats_summary = f"""
+        if logger.is_enabled_for(logging.DEBUG):
+            stats_summary = f"""
             Number of zones: {len(sum_prob)}
             Sample zones:
             {sum_prob[['id', 'sum']].head().to_string()}
             Distribution:
             {sum_prob['sum'].describe().to_string()}
             """
-        logger.debug(stats_summary)
+            logger.debug(stats_summary)
         logger.info(f"Number of zones found: {len(sum_prob)}")
-        logger.info(
-            f"Sample zones (top 5) - ID: {sum_prob['id'].head().tolist()}, "
-            f"Sum: {sum_prob['sum'].head().round(2).tolist()}"
-        )
+        if logger.is_enabled_for(logging.INFO):
+            logger.info(
+                "Sample zones (top 5) - ID: %s, Sum: %s",
+                sum_prob["id"].head().tolist(),
+                sum_prob["sum"].head().round(2).tolist(),
+            )
 
         # Merge Results
-        pre_merge_pop = census[pop_column].sum()
-
-        merged = pd.merge(
-            census,
-            sum_prob[["id", "sum"]],
-            left_on=id_column,
-            right_on="id",
-            how="outer",
-        )
-
-        unmatched_census = merged[merged["sum"].isna()]
-        unmatched_stats = merged[merged[pop_column].isna()]
-
-        logger.info(f"Census zones: {len(unmatched_census)} {unmatched_census['id'].tolist()}")
-        logger.info(
-            f"Statistics zones: {len(unmatched_stats)} {unmatched_stats['id'].tolist()}"
-        )
+        pre_merge_pop = np.nansum(census[pop_column].to_numpy())
+
+        # Align zone sums to census rows by ID instead of an outer merge,
+        # so the result keeps the census row order
+        stat_ids = sum_prob["id"].to_numpy()
+        census_ids = census[id_column].to_numpy()
+        stat_index = pd.Index(stat_ids)
+        pos = stat_index.get_indexer(census_ids)
+        matched = pos >= 0
+
+        zone_sums = np.full(len(census), np.nan)
+        zone_sums[matched] = sum_prob["sum"].to_numpy()[pos[matched]]
+
+        merged = census.copy()
+        merged["id"] = census_ids
+        merged["sum"] = zone_sums
+
+        unmatched_census = census_ids[~matched]
+        unmatched_stats = stat_ids[~stat_index.isin(census_ids)]
+
+        logger.info(f"Census zones: {len(unmatched_census)}")
+        logger.info(f"Statistics zones: {len(unmatched_stats)}")
+        if logger.is_enabled_for(logging.DEBUG):
+            logger.debug("Census zones without statistics: %s", unmatched_census.tolist())
+            logger.debug("Statistics zones without census: %s", unmatched_stats.tolist())
+        if unmatched_stats.size:
+            # These rows would only carry a NaN factor; callers rely on one row per census row
+            logger.warning(
+                f"{len(unmatched_stats)} zones with statistics but no census row "
+                f"are left out of the normalization table"
+            )
         logger.info(
             f"Census rows: {len(census)}, Statistics rows: {len(sum_prob)}, Merged rows: {len(merged)}"
         )
 
         # Normalization Results
-        valid = merged["sum"].values > 0
-        merged["norm"] = np.divide(
-            merged[pop_column],
-            merged["sum"],
-            where=valid,
-            out=np.full_like(merged["sum"], np.nan),
-        )
-        total_pop_check = (merged["sum"] * merged["norm"]).sum()
+        sums = merged["sum"].to_numpy(dtype=np.float64)
+        valid = sums > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            norm = merged[pop_column].to_numpy(dtype=np.float64) / sums
+        norm[~valid] = np.nan
+        merged["norm"] = norm
+        total_pop_check = np.nansum(sums * norm)
+
+        # One NaN-free view of the factors for all summary statistics
+        finite_norm = norm[~np.isnan(norm)]
+        if finite_norm.size:
+            norm_min, norm_max = finite_norm.min(), finite_norm.max()
+            norm_mean = finite_norm.mean()
+            norm_median = np.median(finite_norm)
+            norm_std = finite_norm.std(ddof=1) if finite_norm.size > 1 else np.nan
+        else:
+            norm_min = norm_max = norm_mean = norm_median = norm_std = np.nan
 
         constraint_type = "constrained" if constrained else "unconstrained"
         logger.info(f"Normalization factors summary ({constraint_type}):")
-        logger.info(f"- Range: [{merged['norm'].min():.4f}, {merged['norm'].max():.4f}]")
-        logger.info(f"- Mean: {merged['norm'].mean():.4f}")
-        logger.info(f"- Median: {merged['norm'].median():.4f}")
-        logger.info(f"- Std: {merged['norm'].std():.4f}")
+        logger.info(f"- Range: [{norm_min:.4f}, {norm_max:.4f}]")
+        logger.info(f"- Mean: {norm_mean:.4f}")
+        logger.info(f"- Median: {norm_median:.4f}")
+        logger.info(f"- Std: {norm_std:.4f}")
 
         logger.info(f"Population Verification ({constraint_type}):")
         logger.info(f"Original: {pre_merge_pop:,}")
@@ -482,14 +666,14 @@ class DasymetricMapper:
         )
 
         logger.info(f"Valid normalizations: {valid.sum()} of {len(merged)} zones")
-        logger.info(f"Zones with zero sums: {len(merged[merged['sum'] == 0])}")
+        logger.info(f"Zones with zero sums: {np.count_nonzero(sums == 0)}")
 
         if abs(total_pop_check - pre_merge_pop) / pre_merge_pop > 0.01:
             logger.warning(
                 f"Population difference after normalization exceeds 1% ({constraint_type})"
             )
 
-        invalid_norms = len(merged[merged["norm"].isna()])
+        invalid_norms = len(merged) - finite_norm.size
         if invalid_norms > 0:
             logger.warning(
                 f"Found {invalid_norms} invalid normalization factors ({constraint_type})"
@@ -497,159 +681,106 @@ class DasymetricMapper:
 
         return merged
 
-    def _create_normalized_raster(
-        self,
-        normalized_data: pd.DataFrame,
-        constrained: bool = False,
-        suffix: Optional[str] = None,
-    ) -> str:
+    @staticmethod
+    def _create_norm_lookup(ids: np.ndarray, norms: np.ndarray) -> ZoneLookup:
         """
-        Create raster of normalization factors.
+        Create lookup table from zone IDs to normalization factors.
+
+        Args:
+            ids: Zone IDs
+            norms: Normalization factor of each zone, NaN where invalid
+
+        Returns:
+            ZoneLookup of valid normalization factors
+        """
+        valid = ~np.isnan(norms)
+        lut = ZoneLookup(ids[valid], norms[valid])
+        logger.debug(f"Normalization lookup: {len(lut)} zones")
+        return lut
+
+    def _normalized_raster_path(self, constrained: bool = False, suffix: Optional[str] = None) -> Path:
+        """
+        Get output path of a normalized census raster.
 
         Args:
-            normalized_data: DataFrame with normalization factors
             constrained: Whether this is for constrained output
             suffix: Optional suffix for agesex files
 
         Returns:
             Path to normalized raster
         """
-
-        mastergrid = self.settings.constrain if constrained else self.settings.mastergrid
-
         if suffix:
             output_dir = self.output_dir / "agesex" / "additional_files"
             output_dir.mkdir(parents=True, exist_ok=True)
             if constrained:
-                output_path = output_dir / f"normalized_census_constrained_{suffix}.tif"
-            else:
-                output_path = output_dir / f"normalized_census_{suffix}.tif"
-        else:
-            if constrained:
-                output_path = self.output_dir / "normalized_census_constrained.tif"
-            else:
-                output_path = self.output_dir / "normalized_census.tif"
-
-        logger.debug(f"Output path set to: {output_path}")
-        raster_type = self._get_raster_type_description(output_path)
-        logger.info(f"Creating {raster_type.lower()}")
-
-        # Get profile from mastergrid
-        with rasterio.open(mastergrid) as src:
-            profile = src.profile.copy()
-            profile.update(
-                {
-                    "dtype": "float32",
-                    "nodata": -99,
-                    "blockxsize": self.settings.block_size[0],
-                    "blockysize": self.settings.block_size[1],
-                }
-            )
-            logger.debug("Raster profile created from mastergrid")
-
-        # Create a mapping from zone IDs to normalization factors
-        norm_mapping = {
-            row["id"]: row["norm"]
-            for _, row in normalized_data.iterrows()
-            if not np.isnan(row["norm"])
-        }
-
-        with rasterio.open(mastergrid) as mst, rasterio.open(
-            str(output_path), "w", **profile
-        ) as dst:
-
-            if self.settings.by_block:
-                logger.info("Processing by blocks")
-                windows = [window[1] for window in dst.block_windows()]
-
-                executor = QThreadPool.globalInstance()
-                executor.setMaxThreadCount(self.settings.max_workers)
-
-                workers = []
-                total_valid_mappings = 0
+                return output_dir / f"normalized_census_constrained_{suffix}.tif"
+            return output_dir / f"normalized_census_{suffix}.tif"
 
-                NormalizationWorker.init_progress(len(windows), logger)
+        if constrained:
+            return self.output_dir / "normalized_census_constrained.tif"
+        return self.output_dir / "normalized_census.tif"
 
-                for i, window in enumerate(windows):
-                    worker = NormalizationWorker(
-                        window=window,
-                        mastergrid_path=str(mastergrid),
-                        norm_mapping=norm_mapping,
-                        profile=profile,
-                        idx=i,
-                    )
-                    worker.setAutoDelete(False)
-                    workers.append(worker)
-                    executor.start(worker)
-
-                executor.waitForDone()
+    def _population_raster_path(self, constrained: bool = False, suffix: Optional[str] = None) -> Path:
+        """
+        Get output path of a population raster.
 
-                # Collect results and count valid mappings
-                for i, worker in enumerate(workers):
-                    if worker.result is not None:
-                        dst.write(worker.result, window=windows[i])
-                        total_valid_mappings += worker.valid_mappings
-
-                logger.info(f"\nNormalization summary:")
-                logger.info(f"- Total windows processed: {len(windows)}")
-                logger.info(f"- Total valid mappings: {total_valid_mappings}")
-                logger.info(
-                    f"- Percentage of valid mappings: {total_valid_mappings / len(norm_mapping) * 100:.2f}%"
-                )
+        Args:
+            constrained: Whether this is for constrained output
+            suffix: Optional suffix for agesex files
 
-                workers.clear()
-            else:
-                logger.info("Processing entire raster at once")
-                window = Window(0, 0, dst.width, dst.height)
-                worker = NormalizationWorker(
-                    window=window,
-                    mastergrid_path=str(mastergrid),
-                    norm_mapping=norm_mapping,
-                    profile=profile,
-                )
-                worker.run()
-                if worker.result is not None:
-                    dst.write(worker.result)
-                    logger.info(f"Valid mappings: {worker.valid_mappings}")
+        Returns:
+            Path to population raster
+        """
+        if suffix:
+            output_dir = self.output_dir / "agesex"
+            output_dir.mkdir(exist_ok=True)
+            if constrained:
+                return output_dir / f"population_{suffix}_constrained.tif"
+            return output_dir / f"population_{suffix}.tif"
 
-        raster_type = self._get_raster_type_description(output_path)
-        logger.info(f"{raster_type} created successfully: {output_path}")
-        return str(output_path)
+        if constrained:
+            return self.output_dir / "population_constrained.tif"
+        return self.output_dir / "population_unconstrained.tif"
 
-    def _create_dasymetric_raster(
+    def _create_dasymetric_rasters(
         self,
         prediction_path: str,
-        norm_raster_path: str,
-        constrained: bool = False,
+        norm_luts: Dict[bool, ZoneLookup],
         suffix: Optional[str] = None,
-    ) -> Path:
-        """Create final dasymetric population raster.
+        write_normalized: bool = False,
+    ) -> Dict[bool, Path]:
+        """Create final dasymetric population rasters.
+
+        The unconstrained and constrained outputs are written in one pass, so
+        each window of the prediction raster is read once for both of them.
+        Normalization factors are looked up from the mastergrid zones in the
+        same pass, and are optionally written to the normalized census rasters
+        from that pass as well.
 
         Args:
             prediction_path: Path to prediction raster
-            norm_raster_path: Path to normalization raster
-            constrained: Whether this is constrained output
+            norm_luts: Lookup tables of normalization factors, keyed by
+                whether the output is constrained
             suffix: Optional suffix for agesex files
-        """
-        # Determine output path based on parameters
-        if suffix:
-            # Agesex output
-            output_dir = self.output_dir / "agesex"
-            output_dir.mkdir(exist_ok=True)
-            if constrained:
-                output_path = output_dir / f"population_{suffix}_constrained.tif"
-            else:
-                output_path = output_dir / f"population_{suffix}.tif"
-        else:
-            # Regular output
-            if constrained:
-                output_path = self.output_dir / "population_constrained.tif"
-            else:
-                output_path = self.output_dir / "population_unconstrained.tif"
+            write_normalized: Also write the normalized census rasters
 
-        logger.debug(f"Output path set to: {output_path}")
-        raster_type = self._get_raster_type_description(output_path)
-        logger.info(f"Creating {raster_type.lower()}")
+        Returns:
+            Paths of the population rasters, keyed like norm_luts
+        """
+        outputs = list(norm_luts)
+        output_paths = {c: self._population_raster_path(c, suffix) for c in outputs}
+        for constrained in outputs:
+            logger.debug(f"Output path set to: {output_paths[constrained]}")
+            raster_type = self._get_raster_type_description(output_paths[constrained])
+            logger.info(f"Creating {raster_type.lower()}")
+
+        layers = [
+            (
+                str(self.settings.constrain if constrained else self.settings.mastergrid),
+                norm_luts[constrained],
+            )
+            for constrained in outputs
+        ]
 
         with rasterio.open(prediction_path) as src:
             profile = src.profile.copy()
@@ -659,78 +790,109 @@ class DasymetricMapper:
                     "nodata": -99,
                     "blockxsize": 256,
                     "blockysize": 256,
+                    **_OUTPUT_CREATION_OPTIONS,
                 }
             )
 
-        with rasterio.open(str(output_path), "w", **profile) as dst:
+        norm_paths = {}
+        if write_normalized:
+            norm_paths = {c: self._normalized_raster_path(c, suffix) for c in outputs}
+            for norm_path in norm_paths.values():
+                logger.debug(f"Normalized raster path set to: {norm_path}")
+
+        with ExitStack() as stack:
+            # Input handles cached by the workers are closed after the last window
+            stack.callback(close_cached_datasets)
+            dsts = [
+                stack.enter_context(rasterio.open(str(output_paths[c]), "w", **profile))
+                for c in outputs
+            ]
+            norm_dsts = [
+                stack.enter_context(rasterio.open(str(norm_paths[c]), "w", **profile))
+                if c in norm_paths
+                else None
+                for c in outputs
+            ]
+
             if self.settings.by_block:
-                output_data = np.full(
-                    (dst.height, dst.width), profile["nodata"], dtype=profile["dtype"]
-                )
-                windows = [window[1] for window in dst.block_windows()]
+                windows = self._output_windows(dsts[0])
 
                 executor = QThreadPool.globalInstance()
                 executor.setMaxThreadCount(self.settings.max_workers)
-                workers = []
-
-                DasymetricWorker.init_progress(len(windows), logger)
-
-                for i, window in enumerate(windows):
-                    worker = DasymetricWorker(
-                        window=window,
-                        file_paths={
-                            "prediction": prediction_path,
-                            "normalization": norm_raster_path,
-                        },
+                pending = queue.Queue()
+                done = queue.Queue()
+
+                DasymetricWorker.init_progress(len(windows), logger, layers=len(layers))
+
+                # A fixed set of workers pulls windows from the queue, so no
+                # per-window runnable is created or kept alive
+                runners = []
+                for _ in range(min(len(windows), self.settings.max_workers)):
+                    runner = DasymetricWorker(
+                        window_queue=pending,
+                        prediction_path=prediction_path,
+                        layers=layers,
                         profile=profile,
-                        idx=i,
-                    )
-                    worker.setAutoDelete(False)
-                    workers.append(worker)
-                    executor.start(worker)
-
-                executor.waitForDone()
-
-                for i, worker in enumerate(workers):
-                    if worker.result is not None:
-                        window = windows[i]
-                        result_data = worker.result[0]
-                        output_data[
-                            window.row_off : window.row_off + window.height,
-                            window.col_off : window.col_off + window.width,
-                        ] = result_data
-
-                valid_mask = output_data != profile["nodata"]
-                if np.any(valid_mask):
-                    logger.info("Final data statistics before writing:")
-                    logger.info(
-                        f"- Range: [{output_data[valid_mask].min():.2f}, "
-                        f"{output_data[valid_mask].max():.2f}]"
+                        done_queue=done,
+                        keep_norm=bool(norm_paths),
                     )
-                    logger.info(f"- Mean: {output_data[valid_mask].mean():.2f}")
-                    logger.info(f"- Valid pixels: {np.sum(valid_mask)}")
-
-                dst.write(output_data, indexes=1)
-                workers.clear()
+                    # Runners stay referenced until the pool is done with them
+                    runner.setAutoDelete(False)
+                    runners.append(runner)
+                    executor.start(runner)
+
+                try:
+                    # Keep a bounded number of windows in flight and write each
+                    # one as soon as it completes; failed windows stay nodata
+                    in_flight = min(len(windows), 2 * self.settings.max_workers)
+                    for i in range(in_flight):
+                        pending.put((i, windows[i]))
+
+                    next_window = in_flight
+                    for _ in range(len(windows)):
+                        window, result = done.get()
+                        if result is not None:
+                            populations, norm_factors = result
+                            for layer, dst in enumerate(dsts):
+                                dst.write(populations[layer], window=window)
+                                if norm_dsts[layer] is not None:
+                                    norm_dsts[layer].write(
+                                        norm_factors[layer], indexes=1, window=window
+                                    )
+                        result = populations = norm_factors = None
+
+                        if next_window < len(windows):
+                            pending.put((next_window, windows[next_window]))
+                            next_window += 1
+                finally:
+                    for _ in runners:
+                        pending.put(None)
+                    executor.waitForDone()
+
+                for constrained, stats in zip(outputs, DasymetricWorker.final_stats):
+                    if stats["count"]:
+                        raster_type = self._get_raster_type_description(output_paths[constrained])
+                        logger.info(f"Final data statistics ({raster_type.lower()}):")
+                        logger.info(f"- Range: [{stats['min']:.2f}, {stats['max']:.2f}]")
+                        logger.info(f"- Mean: {stats['sum'] / stats['count']:.2f}")
+                        logger.info(f"- Valid pixels: {stats['count']}")
 
             else:
                 logger.info("Processing entire raster at once")
-                window = Window(0, 0, dst.width, dst.height)
-                worker = DasymetricWorker(
-                    window=window,
-                    file_paths={
-                        "prediction": prediction_path,
-                        "normalization": norm_raster_path,
-                    },
-                    profile=profile,
-                )
-                worker.run()
-                if worker.result is not None:
-                    dst.write(worker.result)
-
-        raster_type = self._get_raster_type_description(output_path)
-        logger.info(f"{raster_type} created successfully: {output_path}")
-        return output_path
+                window = Window(0, 0, dsts[0].width, dsts[0].height)
+                results = dasymetric_window(prediction_path, layers, window, profile["nodata"])
+                for layer, (population, _, norm_data) in enumerate(results):
+                    dsts[layer].write(population, indexes=1)
+                    if norm_dsts[layer] is not None:
+                        norm_dsts[layer].write(norm_data, indexes=1)
+
+        for constrained in outputs:
+            if constrained in norm_paths:
+                raster_type = self._get_raster_type_description(norm_paths[constrained])
+                logger.info(f"{raster_type} created successfully: {norm_paths[constrained]}")
+            raster_type = self._get_raster_type_description(output_paths[constrained])
+            logger.info(f"{raster_type} created successfully: {output_paths[constrained]}")
+        return output_paths
 
     def map(self, prediction_path: str) -> dict[str, Path]:
         """
@@ -742,6 +904,11 @@ class DasymetricMapper:
         Returns:
             Path to final dasymetric population raster
         """
+        with rasterio.Env(**_MAP_GDAL_OPTIONS):
+            return self._map(prediction_path)
+
+    def _map(self, prediction_path: str) -> dict[str, Path]:
+        """Run dasymetric mapping inside the GDAL environment set up by map()."""
 
         # Load and validate inputs
         self._validate_inputs(
@@ -755,33 +922,45 @@ class DasymetricMapper:
         normalized_data = self._calculate_normalization(
             census, prediction_path, id_column, pop_column, constrained=False
         )
-
-        norm_raster_path = self._create_normalized_raster(normalized_data, constrained=False)
-
-        final_unconstrained_path = self._create_dasymetric_raster(
-            prediction_path, norm_raster_path, constrained=False
-        )
-
-        final_paths = {"unconstrained": final_unconstrained_path}
+        norm_luts = {
+            False: self._create_norm_lookup(
+                normalized_data["id"].to_numpy(), normalized_data["norm"].to_numpy()
+            )
+        }
 
         if self.settings.constrain:
             normalized_data_c = self._calculate_normalization(
                 census, prediction_path, id_column, pop_column, constrained=True
             )
-
-            norm_raster_path_c = self._create_normalized_raster(
-                normalized_data_c, constrained=True
+            norm_luts[True] = self._create_norm_lookup(
+                normalized_data_c["id"].to_numpy(), normalized_data_c["norm"].to_numpy()
             )
 
-            final_constrained_path = self._create_dasymetric_raster(
-                prediction_path, norm_raster_path_c, constrained=True
-            )
+        output_paths = self._create_dasymetric_rasters(
+            prediction_path,
+            norm_luts,
+            write_normalized=self.settings.write_intermediate,
+        )
 
-            final_paths["constrained"] = final_constrained_path
+        final_paths = {"unconstrained": output_paths[False]}
+        if True in output_paths:
+            final_paths["constrained"] = output_paths[True]
 
         return final_paths
 
     def map_agesex(self, prediction_path: str, agesex_path: str) -> None:
+        """
+        Perform dasymetric mapping for each age-sex group.
+
+        Args:
+            prediction_path: Path to prediction raster from model
+            agesex_path: Path to age-sex census table
+        """
+        with rasterio.Env(**_MAP_GDAL_OPTIONS):
+            self._map_agesex(prediction_path, agesex_path)
+
+    def _map_agesex(self, prediction_path: str, agesex_path: str) -> None:
+        """Run age-sex mapping inside the GDAL environment set up by map_agesex()."""
 
         # Load and validate inputs
         self._validate_inputs(
@@ -801,39 +980,30 @@ class DasymetricMapper:
         normalized_data = self._calculate_normalization(
             norm, prediction_path, id_column, "one", constrained=False
         )
-
-        for pop_column in pop_columns:
-            normalized = normalized_data.copy()
-            normalized["norm"] *= census[pop_column].values
-
-            # Create normalized raster
-            norm_raster_path = self._create_normalized_raster(
-                normalized, constrained=False,
-            )
-
-            self._create_dasymetric_raster(
-                prediction_path, norm_raster_path, constrained=False,
-                suffix=pop_column
-            )
-
+        # Per-zone factors of a unit population, scaled by each group below;
+        # rows follow the census rows
+        ids = normalized_data["id"].to_numpy()
+        base_norms = {False: normalized_data["norm"].to_numpy()}
         if self.settings.constrain:
             normalized_data_c = self._calculate_normalization(
                 norm, prediction_path, id_column, "one", constrained=True
             )
-
-            for pop_column in pop_columns:
-                normalized = normalized_data_c.copy()
-                normalized["norm"] *= census[pop_column].values
-
-                norm_raster_path = self._create_normalized_raster(
-                    normalized, constrained=True,
-                )
-
-                self._create_dasymetric_raster(
-                    prediction_path,
-                    norm_raster_path,
-                    constrained=True,
-                    suffix=pop_column,
-                )
+            base_norms[True] = normalized_data_c["norm"].to_numpy()
+
+        # One contiguous row of group populations per age-sex column
+        group_pops = np.ascontiguousarray(census[pop_columns].to_numpy(dtype=np.float64).T)
+
+        for pop_column, group_pop in zip(pop_columns, group_pops):
+            norm_luts = {
+                constrained: self._create_norm_lookup(ids, base_norm * group_pop)
+                for constrained, base_norm in base_norms.items()
+            }
+
+            self._create_dasymetric_rasters(
+                prediction_path,
+                norm_luts,
+                suffix=pop_column,
+                write_normalized=self.settings.write_intermediate,
+            )
 
         return
@@ -197,6 +197,7 @@ class FeatureExtractor:
                 by_block=self.settings.by_block,
                 max_workers=self.settings.max_workers,
                 block_size=self.settings.block_size,
+                io_batch=self.settings.io_batch,
             )
             logger.debug(f"Initial features extracted: {res.shape}")
         except Exception as e:
@@ -1,4 +1,4 @@
-import threading
+import logging
 from pathlib import Path
 from typing import Tuple, Optional, List, Dict
 
@@ -7,18 +7,67 @@ import numpy as np
 import pandas as pd
 import rasterio
 from qgis.PyQt.QtCore import QThreadPool, QThread
+from rasterio.windows import Window
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.inspection import permutation_importance
 from sklearn.model_selection import cross_validate
 from sklearn.preprocessing import RobustScaler
+from sklearn.utils import check_random_state
 
 from ..config.settings import Settings
 from ..utils.joblib_manager import joblib_resources
 from ..utils.logger import get_logger
-from ..utils.workers import PredictionWorker
+from ..utils.workers import PredictionWorker, close_cached_datasets
 
 logger = get_logger()
 
+# Feature bytes per prediction batch; matches the per-thread buffer cap in
+# workers so batch buffers are reused rather than reallocated
+_PREDICTION_BATCH_BYTES = 64 * 1024 * 1024
+
+# Rows used to score permutation importance during feature selection
+_IMPORTANCE_SAMPLE_SIZE = 10000
+
+
+def _permutation_importance(params: Dict, X: np.ndarray, y: np.ndarray, n_jobs: int = 1):
+    """
+    Fit a random forest and compute its permutation importance.
+
+    Defined at module level so joblib.Memory can cache it between runs when
+    Settings.cache_importance is enabled. Permutations are scored on at most
+    _IMPORTANCE_SAMPLE_SIZE rows drawn with the forest's random_state; the
+    forest itself is fitted on every row.
+
+    Args:
+        params: Random forest parameters, without n_jobs
+        X: Scaled training features
+        y: Training target
+        n_jobs: Number of threads used to fit the forest; not part of the cache key
+
+    Returns:
+        Permutation importance result
+    """
+    logger.debug("Fitting initial model for feature importance")
+    model = RandomForestRegressor(**params, n_jobs=n_jobs).fit(X, y)
+
+    random_state = params.get("random_state")
+    if len(X) > _IMPORTANCE_SAMPLE_SIZE:
+        rng = check_random_state(random_state)
+        sample = rng.choice(len(X), size=_IMPORTANCE_SAMPLE_SIZE, replace=False)
+        X, y = X[sample], y[sample]
+        logger.debug(f"Scoring permutations on {_IMPORTANCE_SAMPLE_SIZE} rows")
+
+    return permutation_importance(
+        model,
+        X,
+        y,
+        n_repeats=20,
+        n_jobs=1,
+        scoring="neg_root_mean_squared_error",
+        random_state=random_state,
+    )
+
 
 class Model:
     """
@@ -83,20 +132,22 @@ class Model:
         pop_column = self.settings.census["pop_column"]
         id_column = self.settings.census["id_column"]
         drop_cols = np.intersect1d(data.columns.values, [id_column, pop_column, "dens"])
-        X = data.drop(columns=drop_cols).copy()
+        X = data.drop(columns=drop_cols)
         y = data["dens"].values
         if log_scale:
             y = np.log(y + 0.1)
         self.target_mean = y.mean()
         self.feature_names = X.columns.values
 
-        logger.debug(f"Features selected: {self.feature_names.tolist()}")
+        if logger.is_enabled_for(logging.DEBUG):
+            logger.debug(f"Features selected: {self.feature_names.tolist()}")
         logger.debug(f"Target mean: {self.target_mean:.4f}")
 
+        X_scaled = None
         if scaler_path is None:
             logger.info("Creating new scaler")
             self.scaler = RobustScaler()
-            self.scaler.fit(X)
+            X_scaled = self.scaler.fit_transform(X)
         else:
             logger.info(f"Loading scaler from: {scaler_path}")
             with joblib_resources():
@@ -108,10 +159,17 @@ class Model:
                     raise
 
         if model_path is None:
-            X_scaled = self.scaler.transform(X)
-            self.model = RandomForestRegressor(n_estimators=500)
+            scaler_fitted_here = X_scaled is not None
+            if X_scaled is None:
+                X_scaled = self.scaler.transform(X)
+            # Forest fitting and scoring parallelise over trees with threads,
+            # which is safe inside QGIS, unlike process-based joblib backends
+            self.model = RandomForestRegressor(
+                n_estimators=500, n_jobs=self.settings.max_workers
+            )
             logger.debug(
-                f"Initialized RandomForestRegressor with {self.model.n_estimators} trees"
+                f"Initialized RandomForestRegressor with {self.model.n_estimators} trees "
+                f"on {self.model.n_jobs} threads"
             )
 
             with joblib_resources():
@@ -123,8 +181,15 @@ class Model:
 
             X = X[selected]
             self.selected_features = selected
-            self.scaler.fit(X)
-            X_scaled = self.scaler.transform(X)
+            if scaler_fitted_here:
+                # RobustScaler statistics are per feature, so the scaler of the
+                # selected features is a slice of the one fitted on all of them
+                idx = pd.Index(self.feature_names).get_indexer(selected)
+                self.scaler = self._subset_scaler(self.scaler, selected, idx)
+                X_scaled = X_scaled[:, idx]
+            else:
+                self.scaler.fit(X)
+                X_scaled = self.scaler.transform(X)
 
             logger.info("Fitting Random Forest model")
             self.model.fit(X_scaled, y)
@@ -151,6 +216,26 @@ class Model:
 
         logger.info("Model training completed successfully")
 
+    @staticmethod
+    def _subset_scaler(scaler: RobustScaler, columns: np.ndarray, idx: np.ndarray) -> RobustScaler:
+        """
+        Restrict a fitted scaler to a subset of its features.
+
+        Args:
+            scaler: Scaler fitted on all features
+            columns: Names of the features to keep
+            idx: Positions of those features in the fitted scaler
+
+        Returns:
+            Fitted scaler for the selected features only
+        """
+        subset = clone(scaler)
+        subset.center_ = None if scaler.center_ is None else scaler.center_[idx]
+        subset.scale_ = None if scaler.scale_ is None else scaler.scale_[idx]
+        subset.n_features_in_ = len(idx)
+        subset.feature_names_in_ = np.asarray(columns, dtype=object)
+        return subset
+
     def _save_model(self) -> None:
         """Save model and scaler to disk."""
         model_path = self.output_dir / "model.pkl.gz"
@@ -187,7 +272,8 @@ class Model:
 
             self.feature_names = self.scaler.get_feature_names_out()
             self.selected_features = self.feature_names
-            logger.debug(f"Loaded feature names: {self.feature_names.tolist()}")
+            if logger.is_enabled_for(logging.DEBUG):
+                logger.debug(f"Loaded feature names: {self.feature_names.tolist()}")
 
             logger.info("Model and scaler loaded successfully")
         except Exception as e:
@@ -206,13 +292,23 @@ class Model:
         names = self.feature_names
         ymean = self.target_mean
 
-        logger.debug("Fitting initial model for feature importance")
-        model = self.model.fit(X, y)
-
-        logger.info("Calculating permutation importance")
-        result = permutation_importance(
-            model, X, y, n_repeats=20, n_jobs=1, scoring="neg_root_mean_squared_error"
-        )
+        params = self.model.get_params()
+        n_jobs = params.pop("n_jobs", None)
+        importance = _permutation_importance
+        cached = False
+        if self.settings.cache_importance:
+            # Importances depend only on the estimator parameters and the data,
+            # so re-running selection with another threshold reuses the cached
+            # result; the thread count is left out of the key
+            memory = joblib.Memory(Path(self.settings.work_dir) / ".cache", verbose=0)
+            importance = memory.cache(_permutation_importance, ignore=["n_jobs"])
+            cached = importance.check_call_in_cache(params, X, y)
+
+        if cached:
+            logger.info("Reusing cached permutation importance")
+        else:
+            logger.info("Calculating permutation importance")
+        result = importance(params, X, y, n_jobs=n_jobs)
 
         sorted_idx = result.importances_mean.argsort()
         importances = pd.DataFrame(
@@ -280,25 +376,30 @@ class Model:
         logger.debug("Cross-validation completed")
         return metrics
 
-    def _init_prediction(self) -> Tuple[Dict, rasterio.DatasetReader, Dict]:
-        """Initialize resources for prediction."""
-        logger.debug("Opening covariate rasters")
-        src = {}
-
-        for k in self.settings.covariate:
-            src[k] = rasterio.open(self.settings.covariate[k], "r")
-            logger.debug(f"Opened covariate: {k}")
+    def _init_prediction(self) -> Dict:
+        """
+        Get the output profile for prediction.
 
-        mst = rasterio.open(self.settings.mastergrid, "r")
-        profile = mst.profile.copy()
+        Covariates are opened by the prediction workers themselves.
+        """
+        with rasterio.open(self.settings.mastergrid, "r") as mst:
+            profile = mst.profile.copy()
+        block_x, block_y = self.settings.block_size
         profile.update(
             {
+                "driver": "GTiff",
                 "dtype": "float32",
-                "blockxsize": self.settings.block_size[0],
-                "blockysize": self.settings.block_size[1],
+                "blockxsize": block_x,
+                "blockysize": block_y,
+                # GeoTIFF tiles must be multiples of 16 pixels
+                "tiled": block_x % 16 == 0 and block_y % 16 == 0,
+                "compress": "deflate",
+                "predictor": 3,
+                "num_threads": "all_cpus",
+                "bigtiff": "if_safer",
             }
         )
-        return src, mst, profile
+        return profile
 
     def _setup_thread_pool(self) -> QThreadPool:
         """Configure thread pool for parallel processing."""
@@ -309,17 +410,43 @@ class Model:
         logger.info(f"- Using threads: {self.settings.max_workers}")
         return executor
 
-    def _process_windows(self, dst, executor: QThreadPool, log_scale: bool = True) -> Tuple[List, List]:
-        """Process raster windows in parallel."""
+    def _batch_windows(self, windows: List) -> List[List]:
+        """
+        Group raster windows into prediction batches.
+
+        Batches are kept small enough for the float32 features of a batch to
+        fit the workers' reusable buffers, and numerous enough to keep every
+        thread busy.
+
+        Args:
+            windows: Raster windows in processing order
+
+        Returns:
+            List of window batches
+        """
+        if not windows:
+            return []
+
+        pixels = max(int(w.height) * int(w.width) for w in windows)
+        n_features = max(1, len(self.selected_features))
+        by_memory = max(1, _PREDICTION_BATCH_BYTES // (4 * n_features * pixels))
+        by_threads = -(-len(windows) // (2 * max(1, self.settings.max_workers)))
+        size = max(1, min(by_memory, by_threads))
+
+        return [windows[i:i + size] for i in range(0, len(windows), size)]
+
+    def _process_windows(self, dst, executor: QThreadPool, log_scale: bool = True) -> List:
+        """Process raster windows in parallel, one batch of windows per task."""
         windows = [window[1] for window in dst.block_windows()]
+        batches = self._batch_windows(windows)
         workers = []
 
-        logger.info(f"Creating {len(windows)} tasks")
-        PredictionWorker.init_progress(len(windows), logger)
+        logger.info(f"Creating {len(batches)} tasks for {len(windows)} windows")
+        PredictionWorker.init_progress(len(batches), logger)
 
-        for i, window in enumerate(windows):
+        for i, batch in enumerate(batches):
             worker = PredictionWorker(
-                window,
+                batch,
                 self.settings.covariate,
                 self.selected_features,
                 self.model,
@@ -331,36 +458,55 @@ class Model:
             workers.append(worker)
             executor.start(worker)
 
-        return windows, workers
+        return workers
 
-    def _write_results(self, dst, windows: List, workers: List) -> int:
-        """Write worker results to output file."""
+    def _write_results(self, dst, workers: List) -> int:
+        """
+        Write worker results to output file.
+
+        Results are written from this thread only after the pool has finished.
+        Neighbouring windows of a batch that share a block row are joined
+        into one write.
+        """
         results_count = 0
-        writing_lock = threading.Lock()
 
         for i, worker in enumerate(workers):
-            if worker.result is not None:
-                with writing_lock:
-                    dst.write(worker.result, window=windows[i], indexes=1)
-                    results_count += 1
-            else:
+            if worker.result is None:
                 logger.warning(f"No result from worker {i}")
+                continue
+
+            run = []
+            for window, result in zip(worker.windows, worker.result):
+                if run and not self._continues_row(run[-1][0], window):
+                    self._write_run(dst, run)
+                    run = []
+                run.append((window, result))
+                results_count += 1
+            if run:
+                self._write_run(dst, run)
 
         return results_count
 
-    def _cleanup_resources(self, src: Dict, mst: rasterio.DatasetReader) -> None:
-        """Clean up opened raster resources"""
-        logger.debug("Closing raster files")
-        for s in src:
-            try:
-                src[s].close()
-            except Exception as e:
-                logger.warning(f"Failed to close source {s}: {str(e)}")
+    @staticmethod
+    def _continues_row(previous: Window, window: Window) -> bool:
+        """Check whether a window directly follows another in the same block row."""
+        return (
+            window.row_off == previous.row_off
+            and window.height == previous.height
+            and window.col_off == previous.col_off + previous.width
+        )
 
-        try:
-            mst.close()
-        except Exception as e:
-            logger.warning(f"Failed to close mastergrid: {str(e)}")
+    @staticmethod
+    def _write_run(dst, run: List) -> None:
+        """Write horizontally adjacent (window, result) pairs as one window."""
+        first = run[0][0]
+        if len(run) == 1:
+            dst.write(run[0][1], window=first, indexes=1)
+            return
+
+        width = sum(int(window.width) for window, _ in run)
+        merged = Window(first.col_off, first.row_off, width, first.height)
+        dst.write(np.hstack([result for _, result in run]), window=merged, indexes=1)
 
     def predict(self, log_scale: bool = True) -> str:
         """Main prediction method."""
@@ -371,18 +517,24 @@ class Model:
 
         outfile = Path(self.settings.output_dir) / "prediction.tif"
 
+        # Blocks are already predicted in parallel; keep each predict call
+        # on its own thread instead of oversubscribing the cores
+        n_jobs = getattr(self.model, "n_jobs", None) if self.settings.by_block else None
+        if n_jobs is not None:
+            self.model.n_jobs = 1
+
         with joblib_resources():
-            src, mst, profile = self._init_prediction()
+            profile = self._init_prediction()
             try:
                 with rasterio.open(outfile, "w", **profile) as dst:
                     if self.settings.by_block:
                         executor = self._setup_thread_pool()
-                        windows, workers = self._process_windows(dst, executor, log_scale=log_scale)
+                        workers = self._process_windows(dst, executor, log_scale=log_scale)
 
                         executor.waitForDone()
                         PredictionWorker.progress_bar.finish()
 
-                        self._write_results(dst, windows, workers)
+                        self._write_results(dst, workers)
 
                         workers.clear()
                     else:
@@ -390,7 +542,7 @@ class Model:
                         window = rasterio.windows.Window(0, 0, dst.width, dst.height)
 
                         worker = PredictionWorker(
-                            window,
+                            [window],
                             self.settings.covariate,
                             self.selected_features,
                             self.model,
@@ -401,11 +553,13 @@ class Model:
                         worker.run()
 
                         if worker.result is not None:
-                            dst.write(worker.result, indexes=1)
+                            dst.write(worker.result[0], indexes=1)
                         else:
                             logger.error("Failed to process raster")
                             raise RuntimeError("Failed to process raster")
             finally:
-                self._cleanup_resources(src, mst)
+                close_cached_datasets()
+                if n_jobs is not None:
+                    self.model.n_jobs = n_jobs
 
         return str(outfile)
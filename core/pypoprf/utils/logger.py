@@ -103,21 +103,25 @@ class PopRFLogger:
         """Cleanup on deletion."""
         self.close()
 
-    # Logging methods
-    def debug(self, msg: str):
-        self.logger.debug(msg)
+    def is_enabled_for(self, level: int) -> bool:
+        """Check whether messages of the given level would be emitted."""
+        return self.logger.isEnabledFor(level)
 
-    def info(self, msg: str):
-        self.logger.info(msg)
+    # Logging methods; %-style args are only formatted if the message is emitted
+    def debug(self, msg: str, *args):
+        self.logger.debug(msg, *args)
 
-    def warning(self, msg: str):
-        self.logger.warning(msg)
+    def info(self, msg: str, *args):
+        self.logger.info(msg, *args)
 
-    def error(self, msg: str):
-        self.logger.error(msg)
+    def warning(self, msg: str, *args):
+        self.logger.warning(msg, *args)
 
-    def critical(self, msg: str):
-        self.logger.critical(msg)
+    def error(self, msg: str, *args):
+        self.logger.error(msg, *args)
+
+    def critical(self, msg: str, *args):
+        self.logger.critical(msg, *args)
 
 
 # Global logger instance
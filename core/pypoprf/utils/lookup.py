@@ -0,0 +1,249 @@
+from typing import Optional
+
+import numpy as np
+
+# Dense tables are used while the largest zone ID is within this factor
+# of the number of zones; sparser IDs fall back to a sorted search.
+DENSE_LUT_RATIO = 50
+
+# Largest dense table, in entries, built for the zones of a window. Pixel
+# counts only bound the number of zones from above, so a few sparse IDs in a
+# large window would otherwise get tables far bigger than the window.
+DENSE_TABLE_MAX = 1 << 20
+
+
+class ZoneLookup:
+    """
+    Map zone IDs to per-zone values with vectorised NumPy indexing.
+
+    Zone IDs are stored either as a dense array indexed by ID or, when the
+    IDs are sparse, as sorted arrays searched with np.searchsorted.
+    """
+
+    def __init__(self, ids, values, dtype: str = "float32"):
+        """
+        Build the lookup table.
+
+        Args:
+            ids: Zone IDs
+            values: Value for each zone ID
+            dtype: Data type of the looked up values
+        """
+        ids = np.asarray(ids).astype(np.int64)
+        values = np.asarray(values, dtype=dtype)
+        self.dtype = values.dtype
+        self.size = len(ids)
+
+        self.dense = bool(
+            self.size and ids.min() >= 0 and ids.max() < DENSE_LUT_RATIO * self.size
+        )
+        if self.dense:
+            # NaN marks IDs that have no value
+            self.table = np.full(int(ids.max()) + 1, np.nan, dtype=self.dtype)
+            self.table[ids] = values
+            # Copies of the table with NaN replaced by a fill value, see gather()
+            self._filled = {}
+        else:
+            order = np.argsort(ids)
+            self.ids = ids[order]
+            self.values = values[order]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def gather(self, zones: np.ndarray, valid: np.ndarray, fill) -> np.ndarray:
+        """
+        Look up values for an array of zone IDs without counting matches.
+
+        Dense tables are read with a single gather: pixels that are invalid
+        or outside the table are pointed at an extra slot holding fill.
+
+        Args:
+            zones: Array of zone IDs
+            valid: Boolean mask of pixels to look up
+            fill: Value for invalid pixels and zones without a value
+
+        Returns:
+            Array of looked up values with the shape of zones
+        """
+        if not (self.size and self.dense):
+            return self.lookup(zones, valid, fill)[0]
+
+        n = len(self.table)
+        # Cast before selecting: n does not fit in narrow unsigned zone dtypes.
+        # NaN zones of float grids are masked out below, so their cast is moot.
+        with np.errstate(invalid="ignore"):
+            keys = zones.astype(np.intp, copy=False)
+        idx = np.where(valid & (zones >= 0) & (zones < n), keys, n)
+        return self._filled_table(fill)[idx]
+
+    def _filled_table(self, fill) -> np.ndarray:
+        """Get the dense table with NaN and one extra trailing slot set to fill."""
+        table = self._filled.get(fill)
+        if table is None:
+            table = np.append(self.table, np.array(fill, dtype=self.dtype))
+            table[np.isnan(table)] = fill
+            self._filled[fill] = table
+        return table
+
+    def lookup(self, zones: np.ndarray, valid: np.ndarray, fill) -> tuple:
+        """
+        Look up values for an array of zone IDs.
+
+        Args:
+            zones: Array of zone IDs
+            valid: Boolean mask of pixels to look up
+            fill: Value for invalid pixels and zones without a value
+
+        Returns:
+            Tuple containing:
+            - Array of looked up values with the shape of zones
+            - Number of pixels that were matched to a zone
+        """
+        output = np.full(zones.shape, fill, dtype=self.dtype)
+        if not self.size:
+            return output, 0
+
+        if self.dense:
+            valid = valid & (zones >= 0) & (zones < len(self.table))
+            found = self.table[zones[valid].astype(np.int64)]
+            matched = ~np.isnan(found)
+            found[~matched] = fill
+        else:
+            keys = zones[valid].astype(np.int64)
+            pos = np.searchsorted(self.ids, keys)
+            pos[pos == self.size] = 0
+            found = self.values[pos]
+            # NaN values mark IDs without a value, as in dense tables
+            matched = (self.ids[pos] == keys) & ~np.isnan(found)
+            found = np.where(matched, found, fill).astype(self.dtype)
+
+        output[valid] = found
+        return output, int(matched.sum())
+
+
+def dense_table_size(zmin, zmax, n: int) -> Optional[int]:
+    """
+    Get the length of a dense table indexed by zone ID.
+
+    Args:
+        zmin: Smallest zone ID
+        zmax: Largest zone ID
+        n: Number of values the IDs were taken from
+
+    Returns:
+        Table length, or None if the IDs are too sparse or too large for a
+        dense table
+    """
+    if zmin < 0 or zmax >= min(DENSE_LUT_RATIO * n, DENSE_TABLE_MAX):
+        return None
+    return int(zmax) + 1
+
+
+def unique_zones(zones: np.ndarray) -> np.ndarray:
+    """
+    Get the distinct zone IDs of an array.
+
+    Compact non-negative integer IDs are found with np.bincount in linear
+    time; anything else falls back to np.unique.
+
+    Args:
+        zones: Array of zone IDs
+
+    Returns:
+        Sorted array of distinct zone IDs
+    """
+    if zones.size and np.issubdtype(zones.dtype, np.integer):
+        size = dense_table_size(zones.min(), zones.max(), zones.size)
+        if size is not None:
+            present = np.bincount(zones.astype(np.intp, copy=False), minlength=size)
+            return np.flatnonzero(present).astype(zones.dtype)
+    return np.unique(zones)
+
+
+def merge_unique_zones(parts: list) -> np.ndarray:
+    """
+    Combine per-window results of unique_zones.
+
+    Compact non-negative integer IDs are marked in a boolean table instead
+    of sorting the concatenated windows again.
+
+    Args:
+        parts: List of sorted zone ID arrays
+
+    Returns:
+        Sorted array of distinct zone IDs over all windows
+    """
+    parts = [p for p in parts if p.size]
+    if not parts:
+        return np.zeros(0)
+
+    zones = np.concatenate(parts)
+    if np.issubdtype(zones.dtype, np.integer):
+        size = dense_table_size(
+            min(p[0] for p in parts), max(p[-1] for p in parts), zones.size
+        )
+        if size is not None:
+            seen = np.zeros(size, dtype=bool)
+            seen[zones] = True
+            return np.flatnonzero(seen).astype(zones.dtype)
+    return np.unique(zones)
+
+
+def zonal_sums(zones: np.ndarray, values: np.ndarray, valid: np.ndarray) -> tuple:
+    """
+    Count pixels and sum values per zone.
+
+    Args:
+        zones: Array of zone IDs
+        values: Array of values with the shape of zones
+        valid: Boolean mask of pixels to include
+
+    Returns:
+        Tuple of zone IDs, pixel counts and value sums, one entry per zone present
+    """
+    z = zones[valid]
+    v = values[valid].astype(np.float64)
+    if z.size == 0:
+        return z, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+
+    # NaN pixels are counted but left out of the sums, as in get_raster_stats
+    v[np.isnan(v)] = 0.0
+
+    size = None
+    if np.issubdtype(z.dtype, np.integer):
+        size = dense_table_size(z.min(), z.max(), z.size)
+    if size is not None:
+        idx = z.astype(np.intp, copy=False)
+        counts = np.bincount(idx, minlength=size)
+        sums = np.bincount(idx, weights=v, minlength=len(counts))
+        ids = np.flatnonzero(counts).astype(z.dtype)
+        return ids, counts[ids], sums[ids]
+
+    ids, inverse = np.unique(z, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(ids))
+    sums = np.bincount(inverse, weights=v, minlength=len(ids))
+    return ids, counts, sums
+
+
+def merge_zonal_sums(parts: list) -> tuple:
+    """
+    Combine per-window results of zonal_sums.
+
+    Args:
+        parts: List of (ids, counts, sums) tuples
+
+    Returns:
+        Tuple of zone IDs, pixel counts and value sums over all windows
+    """
+    if not parts:
+        return np.zeros(0), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+
+    ids, inverse = np.unique(np.concatenate([p[0] for p in parts]), return_inverse=True)
+    counts = np.bincount(
+        inverse, weights=np.concatenate([p[1] for p in parts]), minlength=len(ids)
+    )
+    sums = np.bincount(
+        inverse, weights=np.concatenate([p[2] for p in parts]), minlength=len(ids)
+    )
+    return ids, counts.astype(np.int64), sums
@@ -1,4 +1,4 @@
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, Iterable, List, Tuple, Optional, Any
 
 import numpy as np
 import pandas as pd
@@ -7,7 +7,8 @@ from qgis.PyQt.QtCore import QThreadPool
 from rasterio.windows import Window
 
 from .logger import get_logger
-from .workers import RasterWorker, RasterStackWorker, MaskWorker
+from .lookup import dense_table_size
+from .workers import RasterWorker, RasterStackWorker, MaskWorker, close_cached_datasets
 
 logger = get_logger()
 
@@ -30,37 +31,141 @@ def get_raster_stats(
     Returns:
         DataFrame with statistics
     """
-    ids = np.unique(m)
-    df_list = []
-
-    for i in ids:
-        if i == skip:
-            continue
-
-        select = np.logical_and(t != nodata, m == i)
-        count = np.sum(select)
-        if count < 1:
-            continue
-
-        tm = np.where(select, t, np.nan)
-        d = pd.DataFrame(
-            {
-                "id": i,
-                "count": count,
-                "sum": np.nansum(tm),
-                "sum2": np.nansum(tm * tm),
-                "min": np.nanmin(tm),
-                "max": np.nanmax(tm),
-            },
-            index=[0],
-        )
+    return get_raster_stats_stack([t], m, nodata_values=[nodata], skip=skip)[0]
+
+
+def get_raster_stats_stack(
+    targets: Iterable[np.ndarray],
+    m: np.ndarray,
+    nodata_values: List[Optional[float]],
+    skip: Optional[float] = None,
+) -> List[pd.DataFrame]:
+    """
+    Calculate statistics for several rasters within the same mask regions.
+
+    The mask is flattened, checked against skip and ordered by zone once,
+    and that work is shared by every target.
+
+    Args:
+        targets: Target raster data, one array per raster; may be a generator
+        m: Mask raster data
+        nodata_values: No data value of each target
+        skip: Value to skip in mask
+
+    Returns:
+        List with a DataFrame of statistics for each target
+    """
+    m = np.asarray(m).ravel()
+    if skip is not None:
+        in_zone = np.flatnonzero(m != skip)
+        zones = m[in_zone]
+    else:
+        in_zone = None
+        zones = m
+
+    size = None
+    if zones.size and np.issubdtype(zones.dtype, np.integer):
+        size = dense_table_size(zones.min(), zones.max(), zones.size)
+
+    order = None
+    if size is None and zones.size:
+        # Pixel positions sorted by zone, so each target only filters them
+        order = np.argsort(zones, kind="stable")
+        if in_zone is not None:
+            order = in_zone[order]
+
+    results = []
+    for t, nodata in zip(targets, nodata_values):
+        t = np.asarray(t).ravel()
+        if zones.size == 0:
+            results.append(pd.DataFrame())
+        elif order is not None:
+            keep = order[t[order] != nodata]
+            if keep.size == 0:
+                results.append(pd.DataFrame())
+            else:
+                results.append(_sorted_raster_stats(m[keep], t[keep].astype(np.float64)))
+        else:
+            select = t != nodata if in_zone is None else in_zone[t[in_zone] != nodata]
+            if not np.any(select):
+                results.append(pd.DataFrame())
+            else:
+                results.append(
+                    _dense_raster_stats(m[select], t[select].astype(np.float64), size)
+                )
+    return results
+
+
+def _sorted_raster_stats(zones: np.ndarray, values: np.ndarray) -> pd.DataFrame:
+    """
+    Calculate per-zone statistics for pixels already ordered by zone.
+
+    Args:
+        zones: Zone ID of each selected pixel, sorted
+        values: Value of each selected pixel
+
+    Returns:
+        DataFrame with statistics
+    """
+    # Reduce each zone's contiguous run
+    starts = np.concatenate(([0], np.flatnonzero(zones[1:] != zones[:-1]) + 1))
+    count = np.diff(np.append(starts, zones.size))
+
+    # NaN pixels are counted but left out of the sums, min and max
+    finite = np.where(np.isnan(values), 0.0, values)
+
+    return pd.DataFrame(
+        {
+            "id": zones[starts],
+            "count": count,
+            "sum": np.add.reduceat(finite, starts),
+            "sum2": np.add.reduceat(finite * finite, starts),
+            "min": np.fmin.reduceat(values, starts),
+            "max": np.fmax.reduceat(values, starts),
+        }
+    )
+
 
-        df_list.append(d)
+def _dense_raster_stats(zones: np.ndarray, values: np.ndarray, size: int) -> pd.DataFrame:
+    """
+    Calculate per-zone statistics for compact non-negative zone IDs.
+
+    Each statistic is a single unsorted pass, accumulated into tables
+    indexed by zone ID.
 
-    if df_list:
-        return pd.concat(df_list, ignore_index=True)
+    Args:
+        zones: Zone ID of each selected pixel
+        values: Value of each selected pixel
+        size: Length of the tables, one more than the largest zone ID
 
-    return pd.DataFrame()
+    Returns:
+        DataFrame with statistics
+    """
+    idx = zones.astype(np.intp, copy=False)
+    finite = np.where(np.isnan(values), 0.0, values)
+
+    count = np.bincount(idx, minlength=size)
+    ids = np.flatnonzero(count)
+
+    # NaN pixels are counted but left out of the sums, min and max; fmin and
+    # fmax skip NaN, so zones whose extremes never moved had no other values
+    vmin = np.full(size, np.inf)
+    vmax = np.full(size, -np.inf)
+    np.fmin.at(vmin, idx, values)
+    np.fmax.at(vmax, idx, values)
+    vmin, vmax = vmin[ids], vmax[ids]
+    has_value = (vmin < np.inf) | (vmax > -np.inf)
+
+    return pd.DataFrame(
+        {
+            "id": ids.astype(zones.dtype),
+            "count": count[ids],
+            "sum": np.bincount(idx, weights=finite, minlength=size)[ids],
+            "sum2": np.bincount(idx, weights=finite * finite, minlength=size)[ids],
+            "min": np.where(has_value, vmin, np.nan),
+            "max": np.where(has_value, vmax, np.nan),
+        }
+    )
 
 
 def aggregate_table(df: pd.DataFrame, prefix: str = "", min_count: int = 1) -> pd.DataFrame:
@@ -79,59 +184,61 @@ def aggregate_table(df: pd.DataFrame, prefix: str = "", min_count: int = 1) -> p
     if df.empty:
         return pd.DataFrame()
 
-    # Group by ID and aggregate
-    ag1 = df[["id", "count", "sum", "sum2"]].groupby("id").sum().reset_index()
-    ag2 = df[["id", "min"]].groupby("id").min().reset_index()
-    ag3 = df[["id", "max"]].groupby("id").max().reset_index()
+    # Group by ID and aggregate every statistic in one pass
+    ag = df.groupby("id").agg(
+        count=("count", "sum"),
+        sum=("sum", "sum"),
+        sum2=("sum2", "sum"),
+        min=("min", "min"),
+        max=("max", "max"),
+    )
 
     # Mask for valid values
-    where = ag1["count"].values > 0
+    where = ag["count"].values > 0
 
     # Calculate mean with safe division
     avg = np.divide(
-        ag1["sum"].values,
-        ag1["count"].values,
-        out=np.zeros_like(ag1["sum"].values, dtype=float),
+        ag["sum"].values,
+        ag["count"].values,
+        out=np.zeros_like(ag["sum"].values, dtype=float),
         where=where,
     )
 
     # Calculate variance with checks
     var_raw = (
         np.divide(
-            ag1["sum2"].values,
-            ag1["count"].values,
-            out=np.zeros_like(ag1["sum2"].values, dtype=float),
+            ag["sum2"].values,
+            ag["count"].values,
+            out=np.zeros_like(ag["sum2"].values, dtype=float),
             where=where,
         )
         - avg * avg
     )
     var = np.maximum(var_raw, 0)  # Replace negative values with 0
 
-    # Safe standard deviation calculation
-    std = np.sqrt(var, where=var >= 0)
+    # Variance is clipped at zero above, so the root is always defined
+    std = np.sqrt(var)
 
     # Handle prefix
     if prefix:
         prefix = f"{prefix}_"
 
-    # Create output DataFrame
-    out = ag2[["id"]].copy()
-    out[prefix + "count"] = ag1["count"].values
-    out[prefix + "sum"] = ag1["sum"].values
-    out[prefix + "min"] = ag2["min"].values
-    out[prefix + "max"] = ag3["max"].values
-    out[prefix + "avg"] = avg
-    out[prefix + "var"] = var
-    out[prefix + "std"] = std
-
     # Filter by minimum count
-    out = out[out[prefix + "count"] > min_count]
-
-    # Replace NaN with 0 in statistics columns
-    stats_cols = [prefix + x for x in ["avg", "var", "std"]]
-    out[stats_cols] = out[stats_cols].fillna(0)
-
-    return out
+    keep = ag["count"].values > min_count
+
+    # Create output DataFrame from complete columns; NaN statistics become 0
+    return pd.DataFrame(
+        {
+            "id": ag.index.values[keep],
+            prefix + "count": ag["count"].values[keep],
+            prefix + "sum": ag["sum"].values[keep],
+            prefix + "min": ag["min"].values[keep],
+            prefix + "max": ag["max"].values[keep],
+            prefix + "avg": np.where(np.isnan(avg[keep]), 0.0, avg[keep]),
+            prefix + "var": np.where(np.isnan(var[keep]), 0.0, var[keep]),
+            prefix + "std": np.where(np.isnan(std[keep]), 0.0, std[keep]),
+        }
+    )
 
 
 def get_windows(src, block_size: Optional[Tuple[int, int]] = (256, 256)):
@@ -154,6 +261,43 @@ def get_windows(src, block_size: Optional[Tuple[int, int]] = (256, 256)):
     return windows
 
 
+def batch_windows(windows: List[Window], batch_size: int = 1) -> List[Window]:
+    """
+    Join runs of neighbouring windows in a row into larger windows.
+
+    Windows are joined while they share a row offset and height and each
+    one starts where the previous one ends, up to batch_size windows each.
+
+    Args:
+        windows: Windows in row-major order, as returned by get_windows
+        batch_size: Maximum number of windows joined into one
+
+    Returns:
+        List of joined windows covering the same area
+    """
+    if batch_size <= 1:
+        return list(windows)
+
+    batched = []
+    run = 0
+    for window in windows:
+        if run and run < batch_size:
+            last = batched[-1]
+            if (
+                window.row_off == last.row_off
+                and window.height == last.height
+                and window.col_off == last.col_off + last.width
+            ):
+                batched[-1] = Window(
+                    last.col_off, last.row_off, last.width + window.width, last.height
+                )
+                run += 1
+                continue
+        batched.append(window)
+        run = 1
+    return batched
+
+
 def remask_layer(
     mastergrid: str,
     mask: str,
@@ -162,6 +306,7 @@ def remask_layer(
     by_block: bool = True,
     max_workers: int = 4,
     block_size: Optional[Tuple[int, int]] = (512, 512),
+    io_batch: int = 1,
 ) -> str:
     """
     Implement additional masking to the mastergrid.
@@ -174,6 +319,7 @@ def remask_layer(
         by_block: Whether to process by blocks
         max_workers: Number of worker processes
         block_size: Size of processing blocks
+        io_batch: Number of neighbouring blocks in a row processed per worker
 
     Returns:
         str: Path to created masked file
@@ -183,7 +329,7 @@ def remask_layer(
         dst = rasterio.open(outfile, "w", **mst.profile)
 
         if by_block:
-            windows = get_windows(mst, block_size)
+            windows = batch_windows(get_windows(mst, block_size), io_batch)
             executor = QThreadPool.globalInstance()
             executor.setMaxThreadCount(max_workers)
             workers = []
@@ -193,8 +339,8 @@ def remask_layer(
             for i, window in enumerate(windows):
                 worker = MaskWorker(
                     window=window,
-                    mst=mst,
-                    msk=msk,
+                    mst_path=mastergrid,
+                    msk_path=mask,
                     mask_value=mask_value,
                     nodata=nodata,
                     idx=i,
@@ -204,6 +350,7 @@ def remask_layer(
                 executor.start(worker)
 
             executor.waitForDone()
+            close_cached_datasets()
 
             for i, worker in enumerate(workers):
                 if worker.result is not None:
@@ -225,6 +372,7 @@ def raster_stat(
     by_block: bool = True,
     max_workers: int = 4,
     block_size: Optional[Tuple[int, int]] = None,
+    io_batch: int = 1,
 ) -> pd.DataFrame:
     """
     Calculate zonal statistics for a raster.
@@ -235,6 +383,7 @@ def raster_stat(
         by_block: Whether to process by blocks
         max_workers: Number of worker processes
         block_size: Size of processing blocks
+        io_batch: Number of neighbouring blocks in a row processed per worker
 
     Returns:
         DataFrame with zonal statistics
@@ -243,7 +392,7 @@ def raster_stat(
     with rasterio.open(mastergrid, "r") as mst, rasterio.open(infile, "r") as tgt:
 
         if by_block:
-            windows = get_windows(mst, block_size)
+            windows = batch_windows(get_windows(mst, block_size), io_batch)
 
             file_paths = {"mastergrid": mastergrid, "target": infile}
 
@@ -275,6 +424,7 @@ def raster_stat_stack(
     by_block: bool = True,
     max_workers: int = 4,
     block_size: Optional[Tuple[int, int]] = None,
+    io_batch: int = 1,
 ) -> pd.DataFrame:
     """
     Calculate zonal statistics for multiple rasters.
@@ -285,6 +435,7 @@ def raster_stat_stack(
         by_block: Whether to process by blocks
         max_workers: Number of worker processes
         block_size: Size of processing blocks
+        io_batch: Number of neighbouring blocks in a row processed per worker
 
     Returns:
         DataFrame with combined statistics
@@ -303,9 +454,9 @@ def raster_stat_stack(
                 nodata_values[key] = src.nodata
 
         if by_block:
-            windows = get_windows(mst, block_size)
+            windows = batch_windows(get_windows(mst, block_size), io_batch)
             process_params = {
-                "func": get_raster_stats,
+                "func": get_raster_stats_stack,
                 "skip": skip,
                 "nodata_values": nodata_values,
                 "keys": list(infiles.keys()),
@@ -319,24 +470,34 @@ def raster_stat_stack(
                 worker_type="stack",
             )
         else:
+            def read_targets():
+                # Read lazily so only one full target is held at a time
+                for path in infiles.values():
+                    with rasterio.open(path, "r") as src:
+                        yield src.read(1)
+
             m = mst.read(1)
-            results = []
-            for key, path in infiles.items():
-                with rasterio.open(path, "r") as src:
-                    t = src.read(1)
-                    results.append(
-                        get_raster_stats(t, m, nodata=nodata_values[key], skip=skip)
-                    )
-            df = [results]
-
-    out_df = pd.DataFrame({"id": []})
+            df = [
+                get_raster_stats_stack(
+                    read_targets(), m, nodata_values=[nodata_values[k] for k in infiles], skip=skip
+                )
+            ]
+
+    tables = []
     for i, key in enumerate(infiles):
         d = [a[i] for a in df if a is not None]
         res = pd.concat(d, ignore_index=True)
         out = aggregate_table(res, prefix=key)
-        out_df = pd.merge(out, out_df, on="id", how="outer")
+        if not out.empty:
+            tables.append(out.set_index("id"))
 
-    return out_df
+    if not tables:
+        return pd.DataFrame({"id": []})
+
+    # Align all tables on zone ID in one outer join; the last raster's
+    # columns come first, as with the former chain of merges
+    out_df = pd.concat(tables[::-1], axis=1, join="outer").sort_index()
+    return out_df.rename_axis("id").reset_index()
 
 
 def parallel_raster_processing(
@@ -385,3 +546,5 @@ def parallel_raster_processing(
         return results
     finally:
         workers.clear()
+        # Input handles cached by the workers are closed once they are done
+        close_cached_datasets()
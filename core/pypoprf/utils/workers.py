@@ -1,17 +1,138 @@
+import atexit
+import itertools
+import logging
 import threading
 import time
 import traceback
-from typing import Union, Optional
+from typing import Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
 import rasterio
 from qgis.PyQt.QtCore import QRunnable
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import RobustScaler
 
 from ..utils.logger import get_logger
+from ..utils.lookup import unique_zones, zonal_sums
 
 logger = get_logger()
 
+# Per-thread read buffers, reused by every worker that runs on the thread
+_read_buffers = threading.local()
+_READ_BUFFER_MAX_BYTES = 64 * 1024 * 1024
+
+
+# Per-thread read-only dataset handles; see open_cached()
+_dataset_cache = threading.local()
+_cached_datasets = []
+_cached_datasets_lock = threading.Lock()
+_cache_generation = 0
+
+
+def open_cached(path: str):
+    """
+    Open a raster for reading, reusing this thread's handle from earlier windows.
+
+    Handles stay open until close_cached_datasets() is called, which must
+    happen once no worker is using them.
+
+    Args:
+        path: Raster path
+
+    Returns:
+        Open rasterio dataset owned by the calling thread
+    """
+    if getattr(_dataset_cache, "generation", None) != _cache_generation:
+        _dataset_cache.datasets = {}
+        _dataset_cache.generation = _cache_generation
+
+    src = _dataset_cache.datasets.get(path)
+    if src is None:
+        src = _dataset_cache.datasets[path] = rasterio.open(path)
+        with _cached_datasets_lock:
+            _cached_datasets.append(src)
+    return src
+
+
+def close_cached_datasets() -> None:
+    """Close every handle opened by open_cached() on any thread."""
+    global _cache_generation
+    with _cached_datasets_lock:
+        for src in _cached_datasets:
+            src.close()
+        _cached_datasets.clear()
+        _cache_generation += 1
+
+
+# Handles left open by an interrupted run are closed at interpreter exit
+atexit.register(close_cached_datasets)
+
+
+def thread_buffer(slot: str, shape: tuple, dtype) -> np.ndarray:
+    """
+    Get an uninitialised array that is reused by later calls on this thread.
+
+    Arrays larger than the per-thread cap are allocated fresh every time.
+
+    Args:
+        slot: Name of the buffer, distinct for arrays that are used together
+        shape: Array shape
+        dtype: Array data type
+
+    Returns:
+        Array of the requested shape and type
+    """
+    dtype = np.dtype(dtype)
+    if int(np.prod(shape)) * dtype.itemsize > _READ_BUFFER_MAX_BYTES:
+        # Whole-raster reads are one-off, don't pin them to the thread
+        return np.empty(shape, dtype=dtype)
+
+    buffers = getattr(_read_buffers, "arrays", None)
+    if buffers is None:
+        buffers = _read_buffers.arrays = {}
+
+    key = (slot, tuple(shape), dtype)
+    buf = buffers.get(key)
+    if buf is None:
+        buf = buffers[key] = np.empty(shape, dtype=dtype)
+    return buf
+
+
+def read_band(src, window, slot: str = "band") -> np.ndarray:
+    """
+    Read the first band of a window into a reusable per-thread buffer.
+
+    The returned array is overwritten by the next read into the same slot
+    on this thread, so results built from it must not keep a view of it.
+
+    Args:
+        src: Open rasterio dataset
+        window: Window to read
+        slot: Name of the buffer, distinct for arrays that are used together
+
+    Returns:
+        Array with the window's data
+    """
+    shape = (int(window.height), int(window.width))
+    buf = thread_buffer(slot, shape, src.dtypes[0])
+    return src.read(1, window=window, out=buf)
+
+
+def mark_completed(worker_class) -> None:
+    """
+    Count a finished window of a worker class and report progress.
+
+    The counter is an itertools.count, whose next() is atomic, so workers
+    don't take a lock to count themselves.
+
+    Args:
+        worker_class: Worker class with completed_counter and progress_bar attributes
+    """
+    completed = next(worker_class.completed_counter)
+    if worker_class.progress_bar:
+        worker_class.progress_bar.update(completed)
+
 
 class ProgressBar:
     def __init__(self, total, width=20, logger=None, update_frequency=None):
@@ -30,8 +151,12 @@ class ProgressBar:
             f"Progress bar initialized: total={total}, update_frequency={self.update_frequency}"
         )
 
-        self.last_update = 0
+        self._next_log_at = self.update_frequency
         self._logged_percentage = -1
+        self._lock = threading.Lock()
+
+        # Bar strings for every fill level, built once
+        self._bars = ["█" * f + "░" * (width - f) for f in range(width + 1)]
 
     def _format_time(self, seconds: float) -> str:
         """Convert seconds to minutes and seconds format."""
@@ -42,30 +167,37 @@ class ProgressBar:
         return f"{seconds:.0f}s"
 
     def update(self, current=None):
-        if current is not None:
-            self.current = current
-        else:
-            self.current += 1
-
+        if current is None:
+            current = self.current + 1
+
+        # Counts below the next logging step only move the counter forward
+        if current < self._next_log_at:
+            if current > self.current:
+                self.current = current
+            return
+
+        with self._lock:
+            # Workers may report their counts out of order
+            self.current = max(self.current, current)
+            if self.current < self._next_log_at:
+                return
+            self._next_log_at = self.current + self.update_frequency
+            self._log()
+
+    def _log(self):
         percentage = self.current / self.total
-        elapsed_time = time.time() - self.start_time
-
-        if self.current - self.last_update >= self.update_frequency:
-            filled = int(self.width * percentage)
-            bar = "█" * filled + "░" * (self.width - filled)
-
-            if percentage != self._logged_percentage:
-                progress_text = (
-                    f'<span style="color: #2355a6">Processing: |{bar}| {percentage:.0%} ({self.current}/{self.total}) '
-                    f'<span style="color: #050500">Elapsed time: {self._format_time(elapsed_time)}</span> '
-                )
-                if self.logger:
-                    self.logger.info(
-                        f'<span style="font-family: monospace;">{progress_text}</span>'
-                    )
-                self._logged_percentage = percentage
+        if percentage == self._logged_percentage:
+            return
 
-            self.last_update = self.current
+        elapsed_time = time.time() - self.start_time
+        bar = self._bars[min(int(self.width * percentage), self.width)]
+        progress_text = (
+            f'<span style="color: #2355a6">Processing: |{bar}| {percentage:.0%} ({self.current}/{self.total}) '
+            f'<span style="color: #050500">Elapsed time: {self._format_time(elapsed_time)}</span> '
+        )
+        if self.logger:
+            self.logger.info(f'<span style="font-family: monospace;">{progress_text}</span>')
+        self._logged_percentage = percentage
 
     def finish(self):
         if self.logger:
@@ -80,13 +212,20 @@ class ProgressBar:
 
 
 class PredictionWorker(QRunnable):
-    completed_workers = 0
+    """
+    Predict a batch of windows with a single model call.
+
+    The selected covariates of every window in the batch are read into one
+    per-thread float32 feature buffer, so the scaler and the forest are run
+    once per batch instead of once per window.
+    """
+
+    completed_counter = itertools.count(1)
     progress_bar = None
-    lock = threading.Lock()
 
-    def __init__(self, window, covariates, selected_features, model, scaler, log_scale=True):
+    def __init__(self, windows, covariates, selected_features, model, scaler, log_scale=True):
         super().__init__()
-        self.window = window
+        self.windows = windows
         self.covariates = covariates
         self.selected_features = selected_features
         self.model = model
@@ -95,40 +234,136 @@ class PredictionWorker(QRunnable):
         self.idx = None
         self.log_scale = log_scale
 
+        # Scaler statistics and trees are looked up once, not per batch call
+        self._scaler_stats = self._bind_scaler()
+        self._trees = self._bind_trees()
+
     @classmethod
     def init_progress(cls, total_workers, logger):
-        cls.completed_workers = 0
+        cls.completed_counter = itertools.count(1)
         cls.progress_bar = ProgressBar(total_workers, logger=logger)
 
+    def _bind_scaler(self) -> Optional[Tuple]:
+        """Get float32 RobustScaler center and scale column vectors, or None to use transform()."""
+        names = getattr(self.scaler, "feature_names_in_", None)
+        if not isinstance(self.scaler, RobustScaler) or (
+            names is not None and list(names) != list(self.selected_features)
+        ):
+            return None
+
+        def column(values):
+            return None if values is None else values.astype(np.float32)[:, np.newaxis]
+
+        return column(self.scaler.center_), column(self.scaler.scale_)
+
+    def _bind_trees(self) -> Optional[list]:
+        """Get the trees of a single-output random forest, or None to use predict()."""
+        if not isinstance(self.model, RandomForestRegressor):
+            return None
+        if getattr(self.model, "n_outputs_", None) != 1:
+            return None
+        if getattr(self.model, "n_features_in_", None) != len(self.selected_features):
+            return None
+        return list(self.model.estimators_)
+
     def run(self):
         try:
-            df = pd.DataFrame()
-            for k, path in self.covariates.items():
-                with rasterio.open(path, "r") as src_file:
-                    arr = src_file.read(window=self.window)[0, :, :]
-                    df[k + "_avg"] = arr.flatten()
-
-            df = df[self.selected_features]
-            sx = self.scaler.transform(df)
-            yp = self.model.predict(sx)
+            # Features are named after their covariate with an "_avg" suffix
+            paths = {k + "_avg": path for k, path in self.covariates.items()}
+            shapes = [(int(w.height), int(w.width)) for w in self.windows]
+            offsets = np.cumsum([0] + [h * w for h, w in shapes])
+
+            features = thread_buffer(
+                "prediction", (len(self.selected_features), offsets[-1]), np.float32
+            )
+            for c, name in enumerate(self.selected_features):
+                src_file = open_cached(paths[name])
+                native = src_file.dtypes[0] == "float32"
+                for i, window in enumerate(self.windows):
+                    out = features[c, offsets[i]:offsets[i + 1]].reshape(shapes[i])
+                    if native:
+                        src_file.read(1, window=window, out=out)
+                    else:
+                        out[...] = read_band(src_file, window, "covariate")
+
+            yp = self._predict(self._scale(features))
             if self.log_scale:
                 yp = np.exp(yp)
-            self.result = yp.reshape(arr.shape)
+            self.result = [
+                yp[offsets[i]:offsets[i + 1]].reshape(shape) for i, shape in enumerate(shapes)
+            ]
 
-            with self.lock:
-                self.__class__.completed_workers += 1
-                if self.__class__.progress_bar:
-                    self.__class__.progress_bar.update(self.__class__.completed_workers)
+            mark_completed(self.__class__)
 
         except Exception as e:
             logger.error(f"Error in worker {self.idx}: {str(e)}")
             # logger.error(traceback.format_exc())
 
+    def _scale(self, features: np.ndarray) -> np.ndarray:
+        """
+        Scale a (features, pixels) buffer and return it as a (pixels, features) matrix.
+
+        RobustScaler statistics are applied in place on the buffer, so the model
+        gets a transposed view without a DataFrame or any copy. Other scalers,
+        and scalers fitted on features in a different order, go through their
+        own transform.
+
+        Args:
+            features: Feature buffer with one row per selected feature
+
+        Returns:
+            Scaled feature matrix with one row per pixel
+        """
+        if self._scaler_stats is None:
+            df = pd.DataFrame(
+                np.ascontiguousarray(features.T), columns=self.selected_features, copy=False
+            )
+            return self.scaler.transform(df)
+
+        center, scale = self._scaler_stats
+        if center is not None:
+            features -= center
+        if scale is not None:
+            features /= scale
+        return features.T
+
+    def _predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict scaled features with the model.
+
+        Random forests are evaluated tree by tree without re-validating the
+        input, since its shape and float32 type are fixed by this worker; this
+        is what RandomForestRegressor.predict does after its checks. Only the
+        check for NaN and infinite values is kept, once per batch.
+
+        Args:
+            X: Scaled feature matrix with one row per pixel
+
+        Returns:
+            Predicted values, one per pixel
+
+        Raises:
+            ValueError: If the features contain NaN or infinite values
+        """
+        if self._trees is None:
+            return self.model.predict(X)
+
+        X = np.asarray(X, dtype=np.float32)
+        if not np.isfinite(X).all():
+            raise ValueError(
+                "Input features contain NaN or infinite values; "
+                "check the nodata values of the covariates"
+            )
+        y = np.zeros(X.shape[0], dtype=np.float64)
+        for tree in self._trees:
+            y += tree.predict(X, check_input=False)
+        y /= len(self._trees)
+        return y
+
 
 class RasterWorker(QRunnable):
-    completed_workers = 0
+    completed_counter = itertools.count(1)
     progress_bar = None
-    lock = threading.Lock()
     total_process_time = 0
     total_workers = 0
 
@@ -142,29 +377,24 @@ class RasterWorker(QRunnable):
 
     @classmethod
     def init_progress(cls, total_workers, logger):
-        cls.completed_workers = 0
+        cls.completed_counter = itertools.count(1)
         cls.progress_bar = ProgressBar(total_workers, logger=logger)
         cls.total_process_time = 0
         cls.total_workers = 0
 
     def run(self):
         try:
-            with rasterio.open(self.file_paths["mastergrid"], "r") as mst, rasterio.open(
-                self.file_paths["target"], "r"
-            ) as tgt:
+            mst = open_cached(self.file_paths["mastergrid"])
+            tgt = open_cached(self.file_paths["target"])
+            m = read_band(mst, self.window, "mastergrid")
+            t = read_band(tgt, self.window, "target")
 
-                m = mst.read(window=self.window)
-                t = tgt.read(window=self.window)
-
-                nodata = tgt.nodata
-                skip = mst.nodata
+            nodata = tgt.nodata
+            skip = mst.nodata
 
             self.result = self.process_params["func"](t, m, nodata=nodata, skip=skip)
 
-            with self.lock:
-                self.__class__.completed_workers += 1
-                if self.__class__.progress_bar:
-                    self.__class__.progress_bar.update(self.__class__.completed_workers)
+            mark_completed(self.__class__)
 
         except Exception as e:
             logger.error(f"Error in worker {self.idx}: {str(e)}")
@@ -172,9 +402,8 @@ class RasterWorker(QRunnable):
 
 
 class RasterStackWorker(QRunnable):
-    completed_workers = 0
+    completed_counter = itertools.count(1)
     progress_bar = None
-    lock = threading.Lock()
     total_process_time = 0
     total_workers = 0
 
@@ -188,192 +417,271 @@ class RasterStackWorker(QRunnable):
 
     @classmethod
     def init_progress(cls, total_workers, logger):
-        cls.completed_workers = 0
+        cls.completed_counter = itertools.count(1)
         cls.progress_bar = ProgressBar(total_workers, logger=logger)
         cls.total_process_time = 0
         cls.total_workers = 0
 
     def run(self):
         try:
-            with rasterio.open(self.file_paths["mastergrid"]) as mst:
-                m = mst.read(1, window=self.window)
-
-                t = []
-                for key in self.process_params["keys"]:
-                    with rasterio.open(self.file_paths[f"target_{key}"]) as src:
-                        t.append(src.read(1, window=self.window))
-
-            results = [
-                self.process_params["func"](
-                    ta,
-                    m,
-                    nodata=self.process_params["nodata_values"][key],
-                    skip=self.process_params["skip"],
-                )
-                for ta, key in zip(t, self.process_params["keys"])
-            ]
-            self.result = results
+            m = read_band(open_cached(self.file_paths["mastergrid"]), self.window, "mastergrid")
+
+            t = []
+            for key in self.process_params["keys"]:
+                src = open_cached(self.file_paths[f"target_{key}"])
+                t.append(read_band(src, self.window, f"target_{key}"))
+
+            # All targets share the mask preparation of this window
+            self.result = self.process_params["func"](
+                t,
+                m,
+                nodata_values=[
+                    self.process_params["nodata_values"][key]
+                    for key in self.process_params["keys"]
+                ],
+                skip=self.process_params["skip"],
+            )
 
-            with self.lock:
-                self.__class__.completed_workers += 1
-                if self.__class__.progress_bar:
-                    self.__class__.progress_bar.update(self.__class__.completed_workers)
+            mark_completed(self.__class__)
 
         except Exception as e:
             logger.error(f"Error in worker {self.idx}: {str(e)}")
             # logger.error(traceback.format_exc())
 
 
-class NormalizationWorker(QRunnable):
-    completed_workers = 0
+class InputScanWorker(QRunnable):
+    completed_counter = itertools.count(1)
     progress_bar = None
-    lock = threading.Lock()
-    total_process_time = 0
-    total_workers = 0
 
-    def __init__(self, window, mastergrid_path, norm_mapping, profile, idx=None):
+    def __init__(self, window, file_paths, idx=None):
         super().__init__()
         self.window = window
-        self.mastergrid_path = mastergrid_path
-        self.norm_mapping = norm_mapping
-        self.profile = profile
+        self.file_paths = file_paths
         self.idx = idx
         self.result = None
-        self.valid_mappings = 0
 
     @classmethod
     def init_progress(cls, total_workers, logger):
-        cls.completed_workers = 0
+        cls.completed_counter = itertools.count(1)
         cls.progress_bar = ProgressBar(total_workers, logger=logger)
-        cls.total_process_time = 0
-        cls.total_workers = 0
 
     def run(self):
         try:
-            with rasterio.open(self.mastergrid_path, "r") as mst:
-                mst_data = mst.read(1, window=self.window)
-                nodata = mst.nodata
+            pred = open_cached(self.file_paths["prediction"])
+            pred_data = read_band(pred, self.window, "prediction")
+            pred_invalid = pred_data == pred.nodata
+            pred_valid = ~pred_invalid
+
+            result = {"count": 0, "min": None, "max": None, "zones": {}}
+            stats = valid_stats(pred_data, pred_invalid)
+            if stats is not None:
+                result["min"], result["max"], _, result["count"] = stats
+
+            # Zone IDs present and prediction sums per zone for each zone grid
+            for key in ("mastergrid", "constrain"):
+                if not self.file_paths.get(key):
+                    continue
+                src = open_cached(self.file_paths[key])
+                zones = read_band(src, self.window, key)
+                zones_valid = zones != src.nodata
+                result["zones"][key] = (
+                    unique_zones(zones[zones_valid]),
+                    zonal_sums(zones, pred_data, zones_valid & pred_valid),
+                )
 
-            output = np.full_like(mst_data, self.profile["nodata"], dtype="float32")
+            self.result = result
 
-            valid_data = mst_data != nodata
-            unique_zones = np.unique(mst_data[valid_data])
+            mark_completed(self.__class__)
 
-            for zone_id in unique_zones:
-                if zone_id in self.norm_mapping:
-                    mask = mst_data == zone_id
-                    output[mask] = self.norm_mapping[zone_id]
-                    self.valid_mappings += mask.sum()
+        except Exception as e:
+            logger.error(f"Error in worker {self.idx}: {str(e)}")
 
-            output[~valid_data] = self.profile["nodata"]
 
-            self.result = output[np.newaxis, :, :]
+def dasymetric_window(prediction_path, layers, window, nodata) -> list:
+    """
+    Distribute population over a window of the prediction raster.
 
-            with self.lock:
-                self.__class__.completed_workers += 1
-                if self.__class__.progress_bar:
-                    self.__class__.progress_bar.update(self.__class__.completed_workers)
+    The prediction window is read once and shared by every layer, so
+    constrained and unconstrained outputs cost one prediction read.
 
-        except Exception as e:
-            logger.error(f"Error in worker {self.idx}: {str(e)}")
-            # logger.error(traceback.format_exc())
+    Args:
+        prediction_path: Path to the prediction raster
+        layers: List of (mastergrid path, ZoneLookup of normalization factors)
+            pairs, one per output
+        window: Window to process
+        nodata: Output value for invalid pixels
+
+    Returns:
+        List with one tuple per layer of the population array, the mask of
+        invalid pixels and the normalization factors of the window
+    """
+    pred = open_cached(prediction_path)
+    pred_data = read_band(pred, window, "prediction")
+    pred_invalid = pred_data == pred.nodata
+
+    results = []
+    for mastergrid_path, lut in layers:
+        mst = open_cached(mastergrid_path)
+        mst_data = read_band(mst, window, "mastergrid")
+        norm_factors = lut.gather(mst_data, mst_data != mst.nodata, nodata)
+
+        invalid_mask = np.equal(norm_factors, nodata)
+        np.logical_or(invalid_mask, pred_invalid, out=invalid_mask)
+
+        # Invalid pixels are overwritten below, so multiply without zeroing them
+        # first; overflow from nodata products is expected and discarded
+        with np.errstate(over="ignore", invalid="ignore"):
+            population = np.multiply(pred_data, norm_factors, dtype=np.float32)
+        np.copyto(population, nodata, where=invalid_mask)
+        results.append((population, invalid_mask, norm_factors))
+    return results
+
+
+def valid_stats(values: np.ndarray, invalid_mask: np.ndarray) -> Optional[Tuple]:
+    """
+    Get the min, max, sum and count of the valid pixels of a window.
+
+    The reductions skip invalid pixels with where= instead of copying the
+    valid pixels out by boolean indexing.
+
+    Args:
+        values: Array of values
+        invalid_mask: Boolean mask of pixels to skip
+
+    Returns:
+        Tuple of (min, max, sum, count), or None if no pixel is valid
+    """
+    count = values.size - int(np.count_nonzero(invalid_mask))
+    if count == 0:
+        return None
+
+    valid = ~invalid_mask
+    vmin = np.min(values, where=valid, initial=np.inf)
+    vmax = np.max(values, where=valid, initial=-np.inf)
+    vsum = np.sum(values, where=valid)
+    return vmin, vmax, vsum, count
 
 
 class DasymetricWorker(QRunnable):
-    completed_workers = 0
+    """
+    Long-lived worker that distributes population over queued windows.
+
+    Each worker takes (idx, window) items from the window queue until it
+    gets None, and puts a (window, result) pair on the done queue for every
+    window. The result is a tuple of per-layer population and normalization
+    arrays, or None if the window failed.
+
+    Statistics are accumulated per worker and merged into final_stats once,
+    when the worker stops.
+    """
+
+    completed_counter = itertools.count(1)
     progress_bar = None
     lock = threading.Lock()
-    final_stats = {"min": float("inf"), "max": float("-inf"), "sum": 0, "count": 0}
+    final_stats = []
 
-    def __init__(self, window, file_paths, profile, idx=None):
+    def __init__(
+        self,
+        window_queue,
+        prediction_path,
+        layers,
+        profile,
+        done_queue,
+        keep_norm=False,
+    ):
         super().__init__()
-        self.window = window
-        self.file_paths = file_paths
+        self.window_queue = window_queue
+        self.prediction_path = prediction_path
+        self.layers = layers
         self.profile = profile
-        self.idx = idx
-        self.result = None
+        self.done_queue = done_queue
+        self.keep_norm = keep_norm
+        self.stats = [self._empty_stats() for _ in layers]
+
+    @staticmethod
+    def _empty_stats() -> dict:
+        return {"min": float("inf"), "max": float("-inf"), "sum": 0, "count": 0}
 
     @classmethod
-    def init_progress(cls, total_workers, logger):
-        cls.completed_workers = 0
+    def init_progress(cls, total_workers, logger, layers=1):
+        cls.completed_counter = itertools.count(1)
         cls.progress_bar = ProgressBar(total_workers, logger=logger)
 
-        cls.final_stats = {
-            "min": float("inf"),
-            "max": float("-inf"),
-            "sum": 0,
-            "count": 0,
-        }
+        # One set of statistics per output layer
+        cls.final_stats = [cls._empty_stats() for _ in range(layers)]
 
     def run(self):
-        try:
-            with rasterio.open(self.file_paths["prediction"]) as pred, rasterio.open(
-                self.file_paths["normalization"]
-            ) as norm:
-
-                pred_data = pred.read(1, window=self.window)
-                norm_data = norm.read(1, window=self.window)
-
-                invalid_mask = (pred_data == pred.nodata) | (
-                    norm_data == self.profile["nodata"]
-                )
-
-                pred_data = np.where(invalid_mask, 0, pred_data)
-                norm_data = np.where(invalid_mask, 0, norm_data)
-
-                population = pred_data * norm_data
+        while True:
+            item = self.window_queue.get()
+            if item is None:
+                break
+
+            idx, window = item
+            result = None
+            try:
+                result = self._process(idx, window)
+            except Exception as e:
+                logger.error(f"Error in worker {idx}: {str(e)}")
+                # logger.error(traceback.format_exc())
+            finally:
+                self.done_queue.put((window, result))
+
+        with self.lock:
+            for final, stats in zip(self.__class__.final_stats, self.stats):
+                final["min"] = min(final["min"], stats["min"])
+                final["max"] = max(final["max"], stats["max"])
+                final["sum"] += stats["sum"]
+                final["count"] += stats["count"]
+
+    def _process(self, idx, window) -> Tuple[list, list]:
+        outputs = dasymetric_window(
+            self.prediction_path, self.layers, window, self.profile["nodata"]
+        )
 
-                valid_values = population[~invalid_mask]
-                if len(valid_values) > 0:
+        result, norm_result = [], []
+        for layer, (population, invalid_mask, norm_factors) in enumerate(outputs):
+            window_stats = valid_stats(population, invalid_mask)
+            if window_stats is not None:
+                vmin, vmax, vsum, count = window_stats
+                if logger.is_enabled_for(logging.DEBUG):
                     logger.debug(
-                        f"Window group {self.idx // 50}: "
-                        f"valid pixels={len(valid_values)}, "
-                        f"range=[{valid_values.min()}, {valid_values.max()}], "
-                        f"mean={valid_values.mean():.2f}"
+                        f"Window {idx}, layer {layer}: "
+                        f"valid pixels={count}, "
+                        f"range=[{vmin}, {vmax}], "
+                        f"mean={vsum / count:.2f}"
                     )
 
-                population[invalid_mask] = self.profile["nodata"]
-
-                final_valid = population[~invalid_mask]
-                if len(final_valid) > 0:
-                    with self.lock:
-                        stats = self.__class__.final_stats
-                        stats["min"] = min(stats["min"], final_valid.min())
-                        stats["max"] = max(stats["max"], final_valid.max())
-                        stats["sum"] += final_valid.sum()
-                        stats["count"] += len(final_valid)
+                stats = self.stats[layer]
+                stats["min"] = min(stats["min"], vmin)
+                stats["max"] = max(stats["max"], vmax)
+                stats["sum"] += vsum
+                stats["count"] += count
 
-                self.result = population[np.newaxis, :, :]
+            result.append(population[np.newaxis, :, :])
+            norm_result.append(norm_factors if self.keep_norm else None)
 
-            with self.lock:
-                self.__class__.completed_workers += 1
-                if self.__class__.progress_bar:
-                    self.__class__.progress_bar.update(self.__class__.completed_workers)
+        mark_completed(self.__class__)
 
-        except Exception as e:
-            logger.error(f"Error in worker {self.idx}: {str(e)}")
-            # logger.error(traceback.format_exc())
+        return result, norm_result
 
 
 class MaskWorker(QRunnable):
-    completed_workers = 0
+    completed_counter = itertools.count(1)
     progress_bar = None
-    lock = threading.Lock()
-    reading_lock = threading.Lock()
 
     def __init__(
         self,
         window,
-        mst,
-        msk,
+        mst_path,
+        msk_path,
         mask_value: int,
         nodata: float,
         idx: Optional[int] = None,
     ):
         super().__init__()
         self.window = window
-        self.mst = mst
-        self.msk = msk
+        self.mst_path = mst_path
+        self.msk_path = msk_path
         self.mask_value = mask_value
         self.nodata = nodata
         self.idx = idx
@@ -381,58 +689,24 @@ class MaskWorker(QRunnable):
 
     @classmethod
     def init_progress(cls, total_workers, logger):
-        cls.completed_workers = 0
+        cls.completed_counter = itertools.count(1)
         cls.progress_bar = ProgressBar(total_workers, logger=logger)
 
     def run(self):
         try:
-            with self.reading_lock:
-                m = self.mst.read(window=self.window)
-                n = self.msk.read(window=self.window)
-
-            m[n == self.mask_value] = self.nodata
+            # Each thread reads through its own handles, so windows are read
+            # concurrently; only the mastergrid array is kept as the result,
+            # the mask is read into this thread's reusable buffer
+            mst = open_cached(self.mst_path)
+            msk = open_cached(self.msk_path)
+            shape = (msk.count, int(self.window.height), int(self.window.width))
+            n = msk.read(window=self.window, out=thread_buffer("mask", shape, msk.dtypes[0]))
+            m = mst.read(window=self.window)
+
+            np.copyto(m, self.nodata, where=n == self.mask_value)
             self.result = m
-            with self.lock:
-                self.__class__.completed_workers += 1
-                if self.__class__.progress_bar:
-                    self.__class__.progress_bar.update(self.__class__.completed_workers)
+            mark_completed(self.__class__)
 
         except Exception as e:
             logger.error(f"Error in mask worker {self.idx}: {str(e)}")
             # logger.error(traceback.format_exc())
-
-
-class ScaledRasterWorker(QRunnable):
-    def __init__(self, window, norm_raster_path, scale_factors, profile, idx=None):
-        super().__init__()
-        self.window = window
-        self.norm_raster_path = norm_raster_path
-        self.scale_factors = scale_factors
-        self.profile = profile
-        self.idx = idx
-        self.result = None
-
-    def run(self):
-        try:
-            with rasterio.open(self.norm_raster_path) as src:
-                norm_data = src.read(1, window=self.window)
-                nodata = src.nodata
-
-            # Create output array
-            output = np.full_like(norm_data, self.profile["nodata"], dtype="float32")
-
-            # Scale the normalized data
-            valid_data = norm_data != nodata
-            unique_zones = np.unique(norm_data[valid_data])
-
-            for zone_id in unique_zones:
-                if zone_id < len(self.scale_factors):
-                    mask = norm_data == zone_id
-                    output[mask] = norm_data[mask] * self.scale_factors[zone_id]
-
-            output[~valid_data] = self.profile["nodata"]
-            self.result = output[np.newaxis, :, :]
-
-        except Exception as e:
-            logger.error(f"Error in worker {self.idx}: {str(e)}")
-            # logger.error(traceback.format_exc())
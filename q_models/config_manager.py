@@ -18,10 +18,14 @@ DEFAULT_CONFIG = {
     "census_id_column": "id",
     "by_block": True,
     "block_size": [512, 512],
+    "window_size": 2048,
+    "io_batch": 4,
     "max_workers": 1,
     "show_progress": False,
     "log_scale": True,
     "selection_threshold": 0.01,
+    "cache_importance": False,
+    "write_intermediate": True,
     "logging": {"level": "INFO", "file": "logs_pypoprf.log"},
 }
 
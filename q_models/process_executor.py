@@ -5,14 +5,12 @@ import traceback
 from logging import Logger
 from pathlib import Path
 
-import pandas as pd
 from qgis.PyQt.QtCore import QThread, pyqtSignal
 from qgis.PyQt.QtWidgets import QMessageBox
 from qgis.core import QgsProject
 
-from ..core.pypoprf import Settings, FeatureExtractor, Model, DasymetricMapper
+from ..core.pypoprf import Settings
 from ..core.pypoprf.utils.joblib_manager import joblib_resources
-from ..core.pypoprf.utils.raster import remask_layer
 
 
 class ProcessWorker(QThread):
@@ -68,6 +66,10 @@ class ProcessWorker(QThread):
     def run(self):
         """Run the analysis process"""
         try:
+            # Heavy modules are imported here rather than at plugin load
+            from ..core.pypoprf import FeatureExtractor, Model, DasymetricMapper
+            from ..core.pypoprf.utils.raster import remask_layer
+
             settings = Settings.from_file(self.config_path)
 
             if not self._is_running:
@@ -97,6 +99,7 @@ class ProcessWorker(QThread):
                     1,
                     outfile=outfile,
                     block_size=settings.block_size,
+                    io_batch=settings.io_batch,
                 )
                 settings.mastergrid = outfile
 
@@ -110,6 +113,7 @@ class ProcessWorker(QThread):
                     0,
                     outfile=outfile,
                     block_size=settings.block_size,
+                    io_batch=settings.io_batch,
                 )
                 settings.constrain = outfile
 
@@ -251,6 +255,8 @@ class ProcessWorker(QThread):
             self.logger.warning("Feature importance file not found")
             return
 
+        import pandas as pd
+
         importance_df = pd.read_csv(feature_importance_path)
         max_importance = importance_df["importance"].max()
         importance_df["importance_normalized"] = importance_df["importance"] / max_importance
@@ -0,0 +1,17 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# The plugin is not installed as a package; import core.pypoprf from the checkout
+sys.path.insert(0, str(ROOT))
+
+# Modules that import across core and q_models need the plugin directory as a
+# package; register it under a fixed name, whatever the checkout is called
+_spec = importlib.util.spec_from_file_location(
+    "pypoprf_plugin", ROOT / "__init__.py", submodule_search_locations=[str(ROOT)]
+)
+_plugin = importlib.util.module_from_spec(_spec)
+sys.modules["pypoprf_plugin"] = _plugin
+_spec.loader.exec_module(_plugin)
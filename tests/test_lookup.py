@@ -0,0 +1,223 @@
+import numpy as np
+import pytest
+
+from core.pypoprf.utils.lookup import (
+    DENSE_LUT_RATIO,
+    DENSE_TABLE_MAX,
+    ZoneLookup,
+    dense_table_size,
+    merge_unique_zones,
+    merge_zonal_sums,
+    unique_zones,
+    zonal_sums,
+)
+
+# Zone IDs with values 10, 20, 30; the last ID decides the table layout
+DENSE_IDS = [1, 2, 5]
+SPARSE_IDS = [1, 2, 10**6]
+
+
+@pytest.fixture(params=[DENSE_IDS, SPARSE_IDS], ids=["dense", "sparse"])
+def zone_ids(request):
+    return request.param
+
+
+def test_lookup_layout():
+    assert ZoneLookup(DENSE_IDS, [10, 20, 30]).dense
+    assert not ZoneLookup(SPARSE_IDS, [10, 20, 30]).dense
+    assert not ZoneLookup([-1, 2, 3], [10, 20, 30]).dense
+
+
+def test_lookup_values_and_matches(zone_ids):
+    lookup = ZoneLookup(zone_ids, [10.0, 20.0, 30.0])
+    last = zone_ids[-1]
+    # Zone 3 has no value, 7 and 2 * 10**6 are beyond the largest ID, -4 is negative
+    zones = np.array([[1, 2, last], [3, 7, -4], [2 * 10**6, 1, 2]], dtype=np.int64)
+    valid = np.ones(zones.shape, dtype=bool)
+    valid[2, 2] = False
+
+    values, matched = lookup.lookup(zones, valid, -1.0)
+
+    expected = [[10.0, 20.0, 30.0], [-1.0, -1.0, -1.0], [-1.0, 10.0, -1.0]]
+    np.testing.assert_array_equal(values, expected)
+    assert values.dtype == np.float32
+    assert matched == 4
+    np.testing.assert_array_equal(lookup.gather(zones, valid, -1.0), expected)
+
+
+def test_lookup_nan_values_are_missing(zone_ids):
+    lookup = ZoneLookup(zone_ids, [10.0, np.nan, 30.0])
+    zones = np.array([1, 2, zone_ids[-1]])
+    valid = np.ones(3, dtype=bool)
+
+    values, matched = lookup.lookup(zones, valid, 0.0)
+
+    np.testing.assert_array_equal(values, [10.0, 0.0, 30.0])
+    assert matched == 2
+    np.testing.assert_array_equal(lookup.gather(zones, valid, 0.0), [10.0, 0.0, 30.0])
+
+
+def test_lookup_fill_values_are_cached_separately():
+    lookup = ZoneLookup(DENSE_IDS, [10.0, 20.0, 30.0])
+    zones = np.array([1, 3])
+    valid = np.ones(2, dtype=bool)
+
+    np.testing.assert_array_equal(lookup.gather(zones, valid, -1.0), [10.0, -1.0])
+    np.testing.assert_array_equal(lookup.gather(zones, valid, np.nan), [10.0, np.nan])
+    np.testing.assert_array_equal(lookup.gather(zones, valid, -1.0), [10.0, -1.0])
+
+
+def test_lookup_empty_table():
+    lookup = ZoneLookup([], [])
+    zones = np.array([1, 2])
+    valid = np.ones(2, dtype=bool)
+
+    assert len(lookup) == 0
+    values, matched = lookup.lookup(zones, valid, -1.0)
+    np.testing.assert_array_equal(values, [-1.0, -1.0])
+    assert matched == 0
+    np.testing.assert_array_equal(lookup.gather(zones, valid, -1.0), [-1.0, -1.0])
+
+
+def test_gather_uint8_zones_at_dtype_max():
+    # The fill slot sits at index 256, which does not fit in uint8 and
+    # must not wrap around to zone 0
+    lookup = ZoneLookup(np.arange(256), np.arange(256) * 2.0 + 1.0)
+    zones = np.array([[0, 1], [255, 255]], dtype=np.uint8)
+    valid = np.array([[True, True], [True, False]])
+
+    result = lookup.gather(zones, valid, -1.0)
+
+    assert lookup.dense
+    np.testing.assert_array_equal(result, [[1.0, 3.0], [511.0, -1.0]])
+    assert result.dtype == np.float32
+
+
+def test_lookup_unsigned_zones(zone_ids):
+    lookup = ZoneLookup(zone_ids, [10.0, 20.0, 30.0])
+    zones = np.array([0, 1, 2, 65535], dtype=np.uint16)
+    valid = np.ones(4, dtype=bool)
+
+    values, matched = lookup.lookup(zones, valid, -1.0)
+
+    np.testing.assert_array_equal(values, [-1.0, 10.0, 20.0, -1.0])
+    assert matched == 2
+    np.testing.assert_array_equal(lookup.gather(zones, valid, -1.0), values)
+
+
+def test_gather_float_zones_with_nan():
+    lookup = ZoneLookup(DENSE_IDS, [10.0, 20.0, 30.0])
+    zones = np.array([1.0, np.nan, 5.0, 6.0])
+    valid = np.ones(4, dtype=bool)
+
+    with np.errstate(invalid="raise"):
+        result = lookup.gather(zones, valid, -1.0)
+
+    np.testing.assert_array_equal(result, [10.0, -1.0, 30.0, -1.0])
+
+
+def test_dense_table_size():
+    assert dense_table_size(0, 9, 1) == 10
+    assert dense_table_size(3, 3, 1) == 4
+    assert dense_table_size(-1, 9, 10) is None
+    assert dense_table_size(0, DENSE_LUT_RATIO * 2, 2) is None
+    assert dense_table_size(0, DENSE_TABLE_MAX - 1, DENSE_TABLE_MAX) == DENSE_TABLE_MAX
+    assert dense_table_size(0, DENSE_TABLE_MAX, DENSE_TABLE_MAX) is None
+
+
+@pytest.mark.parametrize(
+    "zones",
+    [
+        np.array([3, 1, 3, 0, 1], dtype=np.int32),
+        np.array([10**7, 1, 10**7, 5], dtype=np.int64),
+        np.array([-2, 4, -2, 0], dtype=np.int16),
+        np.array([255, 0, 255, 7], dtype=np.uint8),
+        np.array([2.5, 1.0, 2.5]),
+    ],
+    ids=["dense", "sparse", "negative", "uint8", "float"],
+)
+def test_unique_zones(zones):
+    result = unique_zones(zones)
+
+    np.testing.assert_array_equal(result, np.unique(zones))
+    assert result.dtype == zones.dtype
+
+
+def test_unique_zones_empty():
+    assert unique_zones(np.zeros(0, dtype=np.int32)).size == 0
+
+
+@pytest.mark.parametrize(
+    "parts",
+    [
+        [np.array([0, 3]), np.array([1, 3, 4])],
+        [np.array([1, 10**7]), np.array([5])],
+        [np.array([0, 255], dtype=np.uint8), np.array([7, 255], dtype=np.uint8)],
+        [np.array([-2, 1]), np.array([0, 1])],
+    ],
+    ids=["dense", "sparse", "uint8", "negative"],
+)
+def test_merge_unique_zones(parts):
+    result = merge_unique_zones(parts + [np.zeros(0, dtype=parts[0].dtype)])
+
+    np.testing.assert_array_equal(result, np.unique(np.concatenate(parts)))
+    assert result.dtype == parts[0].dtype
+
+
+def test_merge_unique_zones_empty():
+    assert merge_unique_zones([]).size == 0
+    assert merge_unique_zones([np.zeros(0, dtype=np.int32)]).size == 0
+
+
+@pytest.mark.parametrize("last", [5, 10**7], ids=["dense", "sparse"])
+def test_zonal_sums(last):
+    zones = np.array([[1, 1, last], [last, 2, 9]])
+    values = np.array([[1.0, np.nan, 2.0], [3.0, 4.0, 5.0]], dtype=np.float32)
+    valid = np.array([[True, True, True], [True, True, False]])
+
+    ids, counts, sums = zonal_sums(zones, values, valid)
+
+    # NaN pixels are counted but not summed
+    np.testing.assert_array_equal(ids, [1, 2, last])
+    np.testing.assert_array_equal(counts, [2, 1, 2])
+    np.testing.assert_array_equal(sums, [1.0, 4.0, 5.0])
+    assert sums.dtype == np.float64
+
+
+def test_zonal_sums_unsigned_zones():
+    zones = np.array([255, 0, 255, 3], dtype=np.uint8)
+    values = np.array([1.0, 2.0, 3.0, 4.0])
+
+    ids, counts, sums = zonal_sums(zones, values, np.ones(4, dtype=bool))
+
+    np.testing.assert_array_equal(ids, [0, 3, 255])
+    assert ids.dtype == np.uint8
+    np.testing.assert_array_equal(counts, [1, 1, 2])
+    np.testing.assert_array_equal(sums, [2.0, 4.0, 4.0])
+
+
+def test_zonal_sums_no_valid_pixels():
+    ids, counts, sums = zonal_sums(np.array([1, 2]), np.array([1.0, 2.0]), np.zeros(2, bool))
+
+    assert ids.size == counts.size == sums.size == 0
+
+
+def test_merge_zonal_sums():
+    zones = np.array([[1, 2, 2], [3, 1, 10**7]])
+    values = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+    valid = np.ones(zones.shape, dtype=bool)
+
+    parts = [zonal_sums(zones[i], values[i], valid[i]) for i in range(2)]
+    ids, counts, sums = merge_zonal_sums(parts)
+
+    expected = zonal_sums(zones, values, valid)
+    np.testing.assert_array_equal(ids, expected[0])
+    np.testing.assert_array_equal(counts, expected[1])
+    np.testing.assert_array_equal(sums, expected[2])
+    assert counts.dtype == np.int64
+
+
+def test_merge_zonal_sums_empty():
+    ids, counts, sums = merge_zonal_sums([])
+
+    assert ids.size == counts.size == sums.size == 0
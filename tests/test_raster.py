@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip("rasterio")
+pytest.importorskip("qgis")
+
+from rasterio.windows import Window  # noqa: E402
+
+from core.pypoprf.utils.raster import batch_windows  # noqa: E402
+
+
+def grid(rows, cols, size=4):
+    """Row-major blocks of a rows x cols grid, as get_windows returns them."""
+    return [Window(c * size, r * size, size, size) for r in range(rows) for c in range(cols)]
+
+
+def test_batch_windows_joins_runs_in_a_row():
+    result = batch_windows(grid(1, 5), batch_size=2)
+
+    assert result == [Window(0, 0, 8, 4), Window(8, 0, 8, 4), Window(16, 0, 4, 4)]
+
+
+def test_batch_windows_breaks_at_row_end():
+    result = batch_windows(grid(2, 3), batch_size=4)
+
+    assert result == [Window(0, 0, 12, 4), Window(0, 4, 12, 4)]
+
+
+def test_batch_windows_keeps_non_adjacent_blocks_apart():
+    windows = [Window(0, 0, 4, 4), Window(8, 0, 4, 4), Window(12, 0, 4, 4)]
+
+    result = batch_windows(windows, batch_size=3)
+
+    assert result == [Window(0, 0, 4, 4), Window(8, 0, 8, 4)]
+
+
+def test_batch_windows_keeps_blocks_of_different_height_apart():
+    windows = [Window(0, 0, 4, 4), Window(4, 0, 4, 2)]
+
+    assert batch_windows(windows, batch_size=2) == windows
+
+
+@pytest.mark.parametrize("batch_size", [1, 0])
+def test_batch_windows_batch_size_one(batch_size):
+    windows = grid(2, 3)
+
+    result = batch_windows(windows, batch_size=batch_size)
+
+    assert result == windows
+    assert result is not windows
+
+
+def test_batch_windows_covers_the_same_area():
+    windows = grid(3, 7, size=5)
+
+    result = batch_windows(windows, batch_size=3)
+
+    assert sum(w.width * w.height for w in result) == sum(
+        w.width * w.height for w in windows
+    )
+    assert len(result) == 3 * 3
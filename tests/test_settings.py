@@ -0,0 +1,58 @@
+import codecs
+
+import pytest
+
+pytest.importorskip("yaml")
+
+from pypoprf_plugin.core.pypoprf.config.settings import rename_column_in_csv  # noqa: E402
+
+BODY = b"1,10\r\n2,20\r\n3,30\r\n"
+
+
+def write(tmp_path, data: bytes):
+    path = tmp_path / "census.csv"
+    path.write_bytes(data)
+    return path
+
+
+def test_rename_same_length_in_place(tmp_path):
+    path = write(tmp_path, b"id,sum\r\n" + BODY)
+
+    assert rename_column_in_csv(str(path), "sum", "pop")
+
+    assert path.read_bytes() == b"id,pop\r\n" + BODY
+
+
+def test_rename_different_length(tmp_path):
+    path = write(tmp_path, b"id,sum\n1,10\n2,20\n")
+
+    assert rename_column_in_csv(str(path), "sum", "population")
+
+    assert path.read_bytes() == b"id,population\n1,10\n2,20\n"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_rename_with_bom(tmp_path):
+    path = write(tmp_path, codecs.BOM_UTF8 + b"sum,id\r\n" + BODY)
+
+    assert rename_column_in_csv(str(path), "sum", "pop")
+
+    # The header is read as UTF-8 with an optional BOM and written back without it
+    assert path.read_bytes() == b"pop,id\r\n" + BODY
+
+
+def test_rename_quoted_header(tmp_path):
+    path = write(tmp_path, b'"zone, name","sum"\n"a, b",1\n')
+
+    assert rename_column_in_csv(str(path), "sum", "population")
+
+    assert path.read_bytes() == b'"zone, name",population\n"a, b",1\n'
+
+
+def test_rename_missing_column(tmp_path):
+    data = b"id,pop\r\n" + BODY
+    path = write(tmp_path, data)
+
+    assert not rename_column_in_csv(str(path), "sum", "population")
+
+    assert path.read_bytes() == data